@@ -0,0 +1,293 @@
+"""
+Bitmap-encoded per-court-per-day availability
+Packs the scraper's slot rows into one record per (court_id, date)
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+# rec.us hands out availability in 30-minute increments, so a court-day fits in 48 bits
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# rec.us slot times are local to the courts
+COURT_TIMEZONE = "America/Los_Angeles"
+
+# Per-court fields that are identical across every slot of a court-day
+COURT_DAY_FIELDS = [
+    "location_id",
+    "location_name",
+    "court_id",
+    "court_name",
+    "court_type",
+    "price_cents",
+    "price_type",
+]
+
+
+def slot_index(time_str: str, slot_minutes: int = SLOT_MINUTES) -> int:
+    """
+    Convert a time of day to its bit position in a day bitmap
+
+    Args:
+        time_str: Time like "13:30:00" or "13:30"
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Bit index (0 = midnight)
+
+    Raises:
+        ValueError: If the time is not aligned to the bitmap granularity
+    """
+    parts = time_str.split(":")
+    minutes = int(parts[0]) * 60 + int(parts[1])
+    if minutes % slot_minutes:
+        raise ValueError(f"Time {time_str} is not aligned to {slot_minutes}-minute slots")
+    return minutes // slot_minutes
+
+
+def index_to_time(index: int, slot_minutes: int = SLOT_MINUTES) -> str:
+    """
+    Convert a bit position back to a "HH:MM:SS" time of day
+
+    Args:
+        index: Bit index (0 = midnight)
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Time string in the scraper's "HH:MM:SS" format
+    """
+    minutes = index * slot_minutes
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def encode_day(times: Iterable[str], slot_minutes: int = SLOT_MINUTES) -> int:
+    """
+    Encode a collection of available start times into a day bitmap
+
+    Args:
+        times: Times of day ("HH:MM:SS") that are available
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Integer bitmap with bit i set when slot i is available
+    """
+    bitmap = 0
+    for time_str in times:
+        bitmap |= 1 << slot_index(time_str, slot_minutes)
+    return bitmap
+
+
+def decode_day(bitmap: int, slot_minutes: int = SLOT_MINUTES) -> List[str]:
+    """
+    Decode a day bitmap into its sorted list of available start times
+
+    Args:
+        bitmap: Integer bitmap produced by encode_day
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Sorted list of "HH:MM:SS" times
+    """
+    times = []
+    index = 0
+    while bitmap:
+        if bitmap & 1:
+            times.append(index_to_time(index, slot_minutes))
+        bitmap >>= 1
+        index += 1
+    return times
+
+
+def window_mask(start_index: int, duration_minutes: int, slot_minutes: int = SLOT_MINUTES) -> int:
+    """
+    Build the mask covering every slot of a booking window
+
+    Args:
+        start_index: Bit index of the first slot
+        duration_minutes: Length of the window in minutes
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Integer mask with one bit set per slot in the window
+    """
+    n_slots = max(1, -(-duration_minutes // slot_minutes))
+    return ((1 << n_slots) - 1) << start_index
+
+
+def is_window_free(bitmap: int, start_time: str, duration_minutes: int,
+                   slot_minutes: int = SLOT_MINUTES) -> bool:
+    """
+    Check whether every slot of a window is available
+
+    This is the bitmap equivalent of the scraper's full-window check, which walks
+    30-minute increments through a set of available datetimes.
+
+    Args:
+        bitmap: Day bitmap
+        start_time: Window start ("HH:MM:SS")
+        duration_minutes: Window length in minutes
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        True if the whole window is available
+    """
+    start_index = slot_index(start_time, slot_minutes)
+    if start_index + -(-duration_minutes // slot_minutes) > 24 * 60 // slot_minutes:
+        return False
+    mask = window_mask(start_index, duration_minutes, slot_minutes)
+    return bitmap & mask == mask
+
+
+def free_window_starts(bitmap: int, duration_minutes: int, slot_minutes: int = SLOT_MINUTES) -> int:
+    """
+    Compute the bitmap of start slots from which a full window is available
+
+    Shifting and AND-ing the bitmap once per slot in the window keeps this at
+    O(window length) integer ops rather than O(slots * window length).
+
+    Args:
+        bitmap: Day bitmap
+        duration_minutes: Window length in minutes
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Bitmap with bit i set when the window starting at slot i is free
+    """
+    starts = bitmap
+    for offset in range(1, -(-duration_minutes // slot_minutes)):
+        starts &= bitmap >> offset
+    return starts
+
+
+def union(*bitmaps: int) -> int:
+    """Slots available in any of the bitmaps"""
+    result = 0
+    for bitmap in bitmaps:
+        result |= bitmap
+    return result
+
+
+def intersection(*bitmaps: int) -> int:
+    """Slots available in all of the bitmaps"""
+    if not bitmaps:
+        return 0
+    result = bitmaps[0]
+    for bitmap in bitmaps[1:]:
+        result &= bitmap
+    return result
+
+
+def difference(bitmap: int, other: int) -> int:
+    """Slots available in bitmap but not in other"""
+    return bitmap & ~other
+
+
+def count_slots(bitmap: int) -> int:
+    """Number of available slots in a bitmap"""
+    return bin(bitmap).count("1")
+
+
+def aligned_slots(slots: List[Dict], slot_minutes: int = SLOT_MINUTES) -> List[Dict]:
+    """
+    Slots whose time falls on the bitmap grid, for callers that pack best-effort
+
+    Off-grid slots (which pack_slots rejects) are logged and left out.
+    """
+    aligned = []
+    for slot in slots:
+        try:
+            slot_index(slot["time"], slot_minutes)
+        except ValueError as e:
+            print(f"  ⚠️  Skipping slot {slot.get('court_id')} {slot.get('slot_datetime')} in bitmaps: {e}")
+            continue
+        aligned.append(slot)
+    return aligned
+
+
+def pack_slots(slots: List[Dict], slot_minutes: int = SLOT_MINUTES) -> List[Dict]:
+    """
+    Pack scraper slot rows into one record per (court_id, date)
+
+    Args:
+        slots: Slot dicts as returned by scraper.parse_location_data
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        List of court-day records, each with:
+        - the shared court fields (location, court, pricing, court_type)
+        - date: "YYYY-MM-DD"
+        - slot_bitmap: Integer bitmap of available start times
+        - durations: Dict of "HH:MM:SS" -> duration_minutes for slots that have one
+    """
+    records: Dict[tuple, Dict] = {}
+    for slot in slots:
+        key = (slot["court_id"], slot["date"])
+        record = records.get(key)
+        if record is None:
+            record = {field: slot.get(field) for field in COURT_DAY_FIELDS}
+            record["date"] = slot["date"]
+            record["slot_bitmap"] = 0
+            record["durations"] = {}
+            records[key] = record
+
+        record["slot_bitmap"] |= 1 << slot_index(slot["time"], slot_minutes)
+        if slot.get("duration_minutes") is not None:
+            record["durations"][slot["time"]] = slot["duration_minutes"]
+
+    return list(records.values())
+
+
+def unpack_records(records: List[Dict], slot_minutes: int = SLOT_MINUTES) -> List[Dict]:
+    """
+    Expand court-day records back into scraper slot rows
+
+    Args:
+        records: Records produced by pack_slots (or read back from storage)
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        List of slot dicts in the same shape as scraper.parse_location_data
+    """
+    slots = []
+    for record in records:
+        durations = record.get("durations") or {}
+        for time_str in decode_day(int(record["slot_bitmap"]), slot_minutes):
+            slot = {field: record.get(field) for field in COURT_DAY_FIELDS}
+            slot.update({
+                "slot_datetime": f"{record['date']} {time_str}",
+                "date": record["date"],
+                "time": time_str,
+                "duration_minutes": durations.get(time_str),
+                "is_available": True,
+            })
+            slots.append(slot)
+    return slots
+
+
+def bitmap_from_datetimes(slot_datetimes: Iterable[str], date: Optional[str] = None,
+                          slot_minutes: int = SLOT_MINUTES) -> Dict[str, int]:
+    """
+    Encode raw rec.us "YYYY-MM-DD HH:MM:SS" strings into per-date bitmaps
+
+    Args:
+        slot_datetimes: A court's availableSlots array
+        date: Only encode this date ("YYYY-MM-DD") when given
+        slot_minutes: Bitmap granularity in minutes
+
+    Returns:
+        Dict of date -> bitmap
+
+    Raises:
+        ValueError: If a time is not aligned to the bitmap granularity (as in pack_slots)
+    """
+    by_date: Dict[str, int] = {}
+    for slot_time in slot_datetimes:
+        dt = datetime.strptime(slot_time, "%Y-%m-%d %H:%M:%S")
+        slot_date = dt.strftime("%Y-%m-%d")
+        if date is not None and slot_date != date:
+            continue
+        index = slot_index(dt.strftime("%H:%M:%S"), slot_minutes)
+        by_date[slot_date] = by_date.get(slot_date, 0) | (1 << index)
+    return by_date
@@ -0,0 +1,358 @@
+"""
+Location catalog: discovers rec.us locations for many organizations/cities
+and keeps them in an indexed SQLite database the scraper loads at startup
+
+Locations are grouped into shards (one per organization or city). Discovery
+fetches each slug's rec.us page concurrently and pulls the location out of the
+page's __NEXT_DATA__ JSON with a streaming parser, so the download stops as
+soon as that script tag has been read.
+
+Usage:
+    python catalog.py discover                       # built-in SF seeds
+    python catalog.py discover --seeds seeds.json    # {"shard": ["slug", ...], ...}
+    python catalog.py list [--shard sf]
+"""
+
+import argparse
+import codecs
+import json
+import os
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.sqlite3")
+
+# Page bytes read per chunk while looking for __NEXT_DATA__
+CHUNK_BYTES = 16 * 1024
+
+# Slugs from https://sfrecpark.org/1446/Reservable-Tennis-Courts
+SEEDS: Dict[str, List[str]] = {
+    "sf": [
+        "alicemarble", "balboa", "buenavista", "crockeramazon", "dolores", "dupont", "fulton",
+        "glencanyon", "hamilton", "jackson", "joedimaggio", "jpmurphy", "lafayette", "mclaren",
+        "minnielovieward", "miraloma", "moscone", "mountainlake", "parkside", "potrerohill",
+        "presidiowall", "richmond", "rossi", "sterngrove", "stmarys", "sunset", "uppernoe",
+    ],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    location_id TEXT PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    discovered_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_locations_shard_name ON locations (shard, name);
+"""
+
+
+class NextDataExtractor(HTMLParser):
+    """
+    Incremental parser for the <script id="__NEXT_DATA__"> tag of a Next.js page
+
+    Feed it chunks as they arrive; `done` turns True once the closing tag has
+    been seen, and the rest of the page never needs to be read.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._capturing = False
+        self._parts: List[str] = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script" and ("id", "__NEXT_DATA__") in attrs:
+            self._capturing = True
+
+    def handle_data(self, data):
+        if self._capturing:
+            self._parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._capturing:
+            self._capturing = False
+            self.done = True
+
+    def result(self) -> Optional[Dict]:
+        """Parsed __NEXT_DATA__, or None if the tag wasn't found"""
+        if not self.done:
+            return None
+        return json.loads("".join(self._parts))
+
+
+def extract_next_data(chunks: Iterable[str]) -> Optional[Dict]:
+    """
+    Pull __NEXT_DATA__ out of an HTML page delivered as text chunks
+
+    Stops consuming `chunks` as soon as the script tag is closed.
+    """
+    extractor = NextDataExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    return extractor.result()
+
+
+def _find_location(value, location_id: str, depth: int = 6) -> Optional[Dict]:
+    # Next.js page props usually embed the location object; look for it
+    # instead of making a second API call
+    if depth < 0:
+        return None
+    if isinstance(value, dict):
+        if value.get("id") == location_id and isinstance(value.get("name"), str):
+            return value
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+    for child in children:
+        found = _find_location(child, location_id, depth - 1)
+        if found:
+            return found
+    return None
+
+
+def discover_location(slug: str, http) -> Dict:
+    """
+    Resolve a rec.us slug to its location ID and name
+
+    Args:
+        slug: Page slug, e.g. "alicemarble" for https://rec.us/alicemarble
+        http: requests.Session or transport.Transport
+
+    Returns:
+        {"name", "slug", "location_id"}
+
+    Raises:
+        LookupError: if the page has no location
+    """
+    from transport import PAGE_BASE, PAGE_HEADERS
+
+    response = http.get(f"{PAGE_BASE}/{slug}", headers=PAGE_HEADERS, timeout=10, stream=True)
+    try:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        data = extract_next_data(decoder.decode(chunk) for chunk in response.iter_content(CHUNK_BYTES))
+    finally:
+        response.close()
+
+    location_id = (data or {}).get("query", {}).get("locationId")
+    if not location_id:
+        raise LookupError("no locationId in __NEXT_DATA__")
+
+    location = _find_location(data.get("props", {}), location_id)
+    if location is None:
+        # Page props didn't carry the location; fall back to the API for the name
+        from scraper import fetch_location_data
+
+        location = (fetch_location_data(location_id, http) or {}).get("location")
+        if not location:
+            raise LookupError(f"location {location_id} not found in the API")
+    return {"name": location["name"], "slug": slug, "location_id": location_id}
+
+
+def discover(seeds: Dict[str, List[str]], workers: int = 16,
+             skip_slugs: Iterable[str] = ()) -> Iterator[Tuple[str, str, Optional[Dict]]]:
+    """
+    Discover locations for every shard concurrently
+
+    Args:
+        seeds: shard -> slugs to resolve
+        workers: Concurrent page fetches (across all shards)
+        skip_slugs: Slugs already in the catalog
+
+    Yields:
+        (shard, slug, location dict or None if it failed) in completion order
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    import requests
+    from transport import Transport
+
+    skip = set(skip_slugs)
+    jobs = [(shard, slug) for shard, slugs in seeds.items() for slug in slugs if slug not in skip]
+
+    http_session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    http_session.mount("https://", adapter)
+    http = Transport.from_env(session=http_session)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(discover_location, slug, http): (shard, slug) for shard, slug in jobs}
+            for future in as_completed(futures):
+                shard, slug = futures[future]
+                try:
+                    location = future.result()
+                except Exception as e:
+                    print(f"  ✗ {shard}/{slug}: {e}")
+                    location = None
+                yield shard, slug, location
+    finally:
+        http.close()
+
+
+class LocationCatalog:
+    """
+    SQLite-backed location catalog
+
+    Indexed by location ID, slug and (shard, name), so loading one city out of
+    thousands of locations stays a single index range scan.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def upsert(self, shard: str, locations: List[Dict]):
+        """
+        Insert or update locations for a shard; discovered_at is kept for known IDs
+
+        A slug that now resolves to a different location ID replaces the row
+        that held it, since slugs are unique too.
+        """
+        now = datetime.now().isoformat()
+        with self.conn:
+            for loc in locations:
+                stale = self.conn.execute(
+                    "DELETE FROM locations WHERE slug = ? AND location_id != ?", (loc["slug"], loc["location_id"])
+                )
+                if stale.rowcount:
+                    print(f"  ↻ {shard}/{loc['slug']} now points to {loc['location_id']}; dropped the old entry")
+                self.conn.execute(
+                    """
+                    INSERT INTO locations (location_id, slug, name, shard, discovered_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (location_id) DO UPDATE SET
+                        slug = excluded.slug, name = excluded.name, shard = excluded.shard,
+                        updated_at = excluded.updated_at
+                    """,
+                    (loc["location_id"], loc["slug"], loc["name"], shard, now, now),
+                )
+
+    def locations(self, shards: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Locations in the same shape as scraper.LOCATIONS, ordered by shard then name
+
+        Args:
+            shards: Only these shards (default: all)
+        """
+        query = "SELECT name, slug, location_id, shard FROM locations"
+        params: List[str] = []
+        if shards:
+            params = list(shards)
+            query += f" WHERE shard IN ({', '.join('?' * len(params))})"
+        rows = self.conn.execute(query + " ORDER BY shard, name", params).fetchall()
+        return [{"name": name, "slug": slug, "location_id": location_id, "shard": shard}
+                for name, slug, location_id, shard in rows]
+
+    def slugs(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT slug FROM locations")]
+
+    def shard_counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT shard, COUNT(*) FROM locations GROUP BY shard ORDER BY shard"))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def load_locations(default: List[Dict]) -> List[Dict]:
+    """
+    Locations the scraper should cover
+
+    Reads the catalog at REC_CATALOG (default data/catalog.sqlite3), limited to
+    the comma-separated REC_CATALOG_SHARDS if set. Falls back to `default`
+    when there is no catalog or it has no matching locations.
+    """
+    path = os.environ.get("REC_CATALOG", DEFAULT_CATALOG_PATH)
+    if not os.path.exists(path):
+        return default
+    shards = [s for s in os.environ.get("REC_CATALOG_SHARDS", "").split(",") if s]
+    catalog = LocationCatalog(path)
+    try:
+        return catalog.locations(shards or None) or default
+    finally:
+        catalog.close()
+
+
+def discover_into(catalog: LocationCatalog, seeds: Dict[str, List[str]], workers: int = 16,
+                  refresh: bool = False) -> Dict[str, List[Dict]]:
+    """
+    Run discovery and write results to the catalog, one transaction per shard
+
+    Args:
+        refresh: Re-resolve slugs that are already cataloged
+
+    Returns:
+        shard -> newly discovered locations
+    """
+    found: Dict[str, List[Dict]] = {shard: [] for shard in seeds}
+    failed = 0
+    for shard, slug, location in discover(seeds, workers, () if refresh else catalog.slugs()):
+        if location:
+            found[shard].append(location)
+            print(f"  ✓ {shard}/{slug}: {location['name']}")
+        else:
+            failed += 1
+    for shard, locations in found.items():
+        if locations:
+            catalog.upsert(shard, locations)
+    print(f"Discovered {sum(len(v) for v in found.values())} locations ({failed} failed)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover and list rec.us locations")
+    parser.add_argument("--catalog", default=os.environ.get("REC_CATALOG", DEFAULT_CATALOG_PATH))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    discover_parser = subparsers.add_parser("discover", help="Resolve seed slugs into the catalog")
+    discover_parser.add_argument("--seeds", help='JSON file of {"shard": ["slug", ...]} (default: built-in SF)')
+    discover_parser.add_argument("--shard", nargs="+", help="Only these shards")
+    discover_parser.add_argument("--workers", type=int, default=16)
+    discover_parser.add_argument("--refresh", action="store_true", help="Re-resolve cataloged slugs")
+
+    list_parser = subparsers.add_parser("list", help="Print cataloged locations")
+    list_parser.add_argument("--shard", nargs="+", help="Only these shards")
+
+    args = parser.parse_args()
+    catalog = LocationCatalog(args.catalog)
+
+    if args.command == "discover":
+        seeds = dict(SEEDS)
+        if args.seeds:
+            with open(args.seeds) as f:
+                seeds.update(json.load(f))
+        if args.shard:
+            seeds = {shard: slugs for shard, slugs in seeds.items() if shard in args.shard}
+        discover_into(catalog, seeds, args.workers, args.refresh)
+        print(f"Catalog {args.catalog}: {catalog.shard_counts()}")
+    else:
+        for location in catalog.locations(args.shard):
+            print(f"{location['shard']:<8} {location['slug']:<24} {location['location_id']}  {location['name']}")
+
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Slot change events and subscription matching
+Diffs consecutive scrapes into "slot opened"/"slot taken" events and
+delivers the ones users subscribed to through a pluggable sink
+"""
+
+import json
+import queue
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from availability_bitmap import COURT_TIMEZONE
+
+
+SLOT_OPENED = "slot_opened"
+SLOT_TAKEN = "slot_taken"
+
+# Subscription time windows are indexed at the scraper's slot granularity
+SLOT_MINUTES = 30
+
+# Matches any location or sport in the subscription index
+ANY = "*"
+
+
+def slot_key(slot: Dict) -> Tuple[str, str]:
+    """Identity of a slot across scrapes (same as the availability unique constraint)"""
+    return slot["court_id"], slot["slot_datetime"]
+
+
+def diff_slots(previous: Iterable[Dict], current: Iterable[Dict],
+               location_ids: Optional[Iterable[str]] = None,
+               now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Compare two scrapes and emit an event for every slot that appeared or disappeared
+
+    Args:
+        previous: Slot dicts from the last scrape
+        current: Slot dicts from this scrape
+        location_ids: Locations this scrape actually covered; slots of other
+            locations are not compared, so a failed fetch isn't read as every
+            slot being taken. Defaults to the locations present in current.
+        now: Court-local time; slots starting at or before it have expired
+            rather than been taken (default: now in COURT_TIMEZONE)
+
+    Returns:
+        List of event dicts with "event" (slot_opened/slot_taken), "slot" and "detected_at"
+    """
+    current = list(current)
+    if location_ids is None:
+        location_ids = {slot["location_id"] for slot in current}
+    covered = set(location_ids)
+    if now is None:
+        from zoneinfo import ZoneInfo
+
+        now = datetime.now(ZoneInfo(COURT_TIMEZONE)).replace(tzinfo=None)
+    # slot_datetime strings are "YYYY-MM-DD HH:MM:SS", so they compare in time order
+    cutoff = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    def live(slots: Iterable[Dict]) -> Dict[Tuple[str, str], Dict]:
+        return {
+            slot_key(slot): slot for slot in slots
+            if slot["location_id"] in covered and slot["slot_datetime"] > cutoff
+        }
+
+    previous_by_key = live(previous)
+    current_by_key = live(current)
+    detected_at = now.isoformat()
+
+    events = []
+    for key, slot in current_by_key.items():
+        if key not in previous_by_key:
+            events.append({"event": SLOT_OPENED, "slot": slot, "detected_at": detected_at})
+    for key, slot in previous_by_key.items():
+        if key not in current_by_key:
+            events.append({"event": SLOT_TAKEN, "slot": slot, "detected_at": detected_at})
+    return events
+
+
+def carry_uncovered(previous: Iterable[Dict], current: List[Dict], location_ids: Iterable[str]) -> List[Dict]:
+    """
+    Baseline for the next diff: this scrape's slots plus the previous slots of
+    locations it didn't cover, so they aren't reported as opened once their
+    fetch succeeds again
+    """
+    covered = set(location_ids)
+    return current + [slot for slot in previous if slot["location_id"] not in covered]
+
+
+def _minutes(time_str: str) -> int:
+    parts = time_str.split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+class SubscriptionMatcher:
+    """
+    Index of user subscriptions keyed by (location, sport, time slot)
+
+    Each subscription is registered under every 30-minute slot its time window
+    covers, so matching an event is a handful of dict lookups instead of a loop
+    over all subscriptions.
+
+    Subscription fields (all optional except id):
+        id, location_id, court_type, start_time ("HH:MM:SS"), end_time,
+        min_duration_minutes, days_of_week (list of Python weekdays, 0=Monday),
+        events (list of event types, default slot_opened only), webhook_url
+    """
+
+    def __init__(self, subscriptions: Iterable[Dict]):
+        self.index: Dict[Tuple[str, str, int], List[Dict]] = {}
+        self.size = 0
+        for subscription in subscriptions:
+            self.add(subscription)
+
+    def add(self, subscription: Dict):
+        """Register a subscription in the index"""
+        start = _minutes(subscription.get("start_time") or "00:00:00") // SLOT_MINUTES
+        end_time = subscription.get("end_time")
+        end = -(-_minutes(end_time) // SLOT_MINUTES) if end_time else 24 * 60 // SLOT_MINUTES
+        location = subscription.get("location_id") or ANY
+        court_type = subscription.get("court_type") or ANY
+        for slot in range(start, end):
+            self.index.setdefault((location, court_type, slot), []).append(subscription)
+        self.size += 1
+
+    def match(self, event: Dict) -> List[Dict]:
+        """
+        Find subscriptions interested in an event
+
+        Args:
+            event: Event dict from diff_slots
+
+        Returns:
+            Matching subscription dicts
+        """
+        slot = event["slot"]
+        slot_index = _minutes(slot["time"]) // SLOT_MINUTES
+        weekday = datetime.strptime(slot["date"], "%Y-%m-%d").weekday()
+
+        # A slot without a court_type only matches sport-agnostic subscriptions
+        court_types = {slot.get("court_type") or ANY, ANY}
+
+        matches = []
+        for location in {slot["location_id"], ANY}:
+            for court_type in court_types:
+                for subscription in self.index.get((location, court_type, slot_index), []):
+                    if event["event"] not in (subscription.get("events") or [SLOT_OPENED]):
+                        continue
+                    days = subscription.get("days_of_week")
+                    if days and weekday not in days:
+                        continue
+                    min_duration = subscription.get("min_duration_minutes")
+                    if min_duration and (slot.get("duration_minutes") or 0) < min_duration:
+                        continue
+                    matches.append(subscription)
+        return matches
+
+    def match_all(self, events: Iterable[Dict]) -> List[Dict]:
+        """
+        Match a batch of events
+
+        Returns:
+            List of {"subscription": ..., "event": ...} deliveries
+        """
+        deliveries = []
+        for event in events:
+            for subscription in self.match(event):
+                deliveries.append({"subscription": subscription, "event": event})
+        return deliveries
+
+
+class EventSink:
+    """Destination for matched deliveries"""
+
+    def deliver(self, deliveries: List[Dict]) -> int:
+        """
+        Send deliveries
+
+        Args:
+            deliveries: {"subscription": ..., "event": ...} dicts from SubscriptionMatcher
+
+        Returns:
+            Number of deliveries sent
+        """
+        raise NotImplementedError
+
+
+class MemorySink(EventSink):
+    """Keeps deliveries in a list; local stand-in for tests and dry runs"""
+
+    def __init__(self):
+        self.deliveries: List[Dict] = []
+
+    def deliver(self, deliveries: List[Dict]) -> int:
+        self.deliveries.extend(deliveries)
+        return len(deliveries)
+
+
+class QueueSink(EventSink):
+    """Puts deliveries on a queue.Queue for an in-process consumer"""
+
+    def __init__(self, target: Optional[queue.Queue] = None):
+        self.queue = target if target is not None else queue.Queue()
+
+    def deliver(self, deliveries: List[Dict]) -> int:
+        for delivery in deliveries:
+            self.queue.put(delivery)
+        return len(deliveries)
+
+
+class FileSink(EventSink):
+    """Appends deliveries to a JSON Lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def deliver(self, deliveries: List[Dict]) -> int:
+        with open(self.path, "a") as f:
+            for delivery in deliveries:
+                f.write(json.dumps(delivery) + "\n")
+        return len(deliveries)
+
+
+class WebhookSink(EventSink):
+    """
+    POSTs deliveries as JSON, one request per webhook URL
+
+    Uses each subscription's webhook_url, falling back to default_url.
+    """
+
+    def __init__(self, default_url: Optional[str] = None, timeout: float = 5):
+        self.default_url = default_url
+        self.timeout = timeout
+
+    def deliver(self, deliveries: List[Dict]) -> int:
+        import requests
+
+        by_url: Dict[str, List[Dict]] = {}
+        for delivery in deliveries:
+            url = delivery["subscription"].get("webhook_url") or self.default_url
+            if url:
+                by_url.setdefault(url, []).append(delivery)
+
+        sent = 0
+        for url, batch in by_url.items():
+            try:
+                response = requests.post(url, json={"deliveries": batch}, timeout=self.timeout)
+                response.raise_for_status()
+                sent += len(batch)
+            except requests.exceptions.RequestException as e:
+                print(f"Error delivering {len(batch)} events to {url}: {e}")
+        return sent
+
+
+def process_scrape(previous: Iterable[Dict], current: Iterable[Dict],
+                   matcher: SubscriptionMatcher, sink: EventSink,
+                   location_ids: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Diff two scrapes, match events against subscriptions and deliver
+
+    Args:
+        previous: Slot dicts from the last scrape
+        current: Slot dicts from this scrape
+        matcher: Subscription index
+        sink: Where matched deliveries go
+        location_ids: Locations this scrape covered (see diff_slots)
+
+    Returns:
+        Summary dict with event and delivery counts
+    """
+    events = diff_slots(previous, current, location_ids)
+    deliveries = matcher.match_all(events)
+    delivered = sink.deliver(deliveries) if deliveries else 0
+    return {
+        "opened": sum(1 for e in events if e["event"] == SLOT_OPENED),
+        "taken": sum(1 for e in events if e["event"] == SLOT_TAKEN),
+        "matched": len(deliveries),
+        "delivered": delivered,
+    }
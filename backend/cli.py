@@ -0,0 +1,398 @@
+"""
+Command-line interface for the court scraper
+
+Commands:
+    scrape    Scrape all locations and print or save the result
+    store     Scrape all locations and replace the data in Supabase
+    backfill  Parallel, resumable bulk load into a storage sink
+    bench     Time the fetch and parse stages
+
+Run with: python cli.py <command> --help
+Set REC_TRANSPORT=record or REC_TRANSPORT=replay to record rec.us responses or
+run offline against them (see transport.py)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "backfill_checkpoint.json")
+
+
+def _make_sink(spec: str):
+    """
+    Build a storage sink from a --sink value
+
+    Args:
+        spec: "supabase", "jsonl:<path>", "arrow:<dir>" or "parquet:<dir>"
+    """
+    from storage import JsonlSink, SupabaseStore
+
+    if spec == "supabase":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        return SupabaseStore()
+    if spec.startswith("jsonl:"):
+        return JsonlSink(spec[len("jsonl:"):])
+    fmt, _, root = spec.partition(":")
+    if fmt in ("arrow", "parquet") and root:
+        from snapshots import SnapshotSink
+
+        return SnapshotSink(root, fmt)
+    raise SystemExit(f"Unknown sink: {spec} "
+                     "(expected 'supabase', 'jsonl:<path>', 'arrow:<dir>' or 'parquet:<dir>')")
+
+
+def _select_locations(location_args: Optional[List[str]]) -> List[Dict]:
+    from scraper import LOCATIONS, get_location_by_id, get_location_by_slug
+
+    if not location_args:
+        return LOCATIONS
+    selected = []
+    for value in location_args:
+        location = get_location_by_slug(value) or get_location_by_id(value)
+        if location is None:
+            raise SystemExit(f"Unknown location: {value}")
+        selected.append(location)
+    return selected
+
+
+class Checkpoint:
+    """
+    Backfill progress persisted to disk after every completed location
+
+    The file is rewritten atomically (write to temp file, then rename), so a
+    crash mid-write never leaves a corrupt checkpoint behind.
+
+    Alongside the completed locations it keeps the sink's position (for
+    storage.JsonlSink, its file sizes) as of the last recorded write. A crash
+    between a write and its checkpoint leaves rows past that position, which a
+    resumed run truncates before writing that location again.
+    """
+
+    def __init__(self, path: str, params: Dict):
+        self.path = path
+        self.params = params
+        self.completed: Dict[str, int] = {}
+        self.sink_position = None
+
+    def load(self) -> bool:
+        """
+        Load progress from disk if it belongs to a run with the same parameters
+
+        Returns:
+            True if progress was restored
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("params") != self.params:
+            print(f"⚠️  Checkpoint {self.path} is for different parameters, starting fresh")
+            return False
+        self.completed = data.get("completed", {})
+        self.sink_position = data.get("sink_position")
+        return True
+
+    def mark_done(self, location_id: str, slot_count: int, sink_position=None):
+        self.completed[location_id] = slot_count
+        self.sink_position = sink_position
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "params": self.params,
+                "completed": self.completed,
+                "sink_position": self.sink_position,
+                "updated_at": datetime.now().isoformat(),
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def _fetch_and_parse(location: Dict, session, start_date: Optional[str], end_date: Optional[str]):
+    from scraper import fetch_location_data, parse_location_data
+
+    location_data = fetch_location_data(location["location_id"], session)
+    if not location_data:
+        return None, []
+    return parse_location_data(location_data, start_date, end_date)
+
+
+def backfill(locations: List[Dict], sink, workers: int = 8, start_date: Optional[str] = None,
+             end_date: Optional[str] = None, checkpoint: Optional[Checkpoint] = None,
+             renew_lease: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    Fetch many locations in parallel and stream each result into a sink
+
+    Fetching and parsing run on a thread pool; writes happen on the calling
+    thread as results complete, so sinks don't need to be thread-safe. Each
+    finished location is recorded in the checkpoint, and locations already in
+    it are skipped.
+
+    Sinks with position()/truncate() (storage.JsonlSink) are rolled back to the
+    checkpoint's position before resuming, so a location whose write landed but
+    wasn't checkpointed isn't written twice. SupabaseStore upserts, so
+    rewriting a location is harmless; SnapshotSink starts a new snapshot per run.
+
+    Args:
+        locations: Entries from scraper.LOCATIONS
+        sink: Object with write(locations, slots), e.g. storage.SupabaseStore or storage.JsonlSink
+        workers: Number of concurrent fetches
+        start_date: Only keep slots on or after this "YYYY-MM-DD"
+        end_date: Only keep slots on or before this "YYYY-MM-DD"
+        checkpoint: Progress tracker for resuming
+        renew_lease: Called before each write; if it returns False the lease was
+            lost to another scraper and the backfill stops (re-run to resume)
+
+    Returns:
+        Summary dict with counts of completed, skipped and failed locations
+    """
+    import requests
+
+    done = checkpoint.completed if checkpoint else {}
+    if checkpoint and hasattr(sink, "position"):
+        if checkpoint.sink_position is not None:
+            sink.truncate(checkpoint.sink_position)
+        else:
+            # Nothing written yet; anything past here belongs to this run
+            checkpoint.sink_position = sink.position()
+            checkpoint.save()
+    pending = [location for location in locations if location["location_id"] not in done]
+    print(f"Backfilling {len(pending)} locations ({len(locations) - len(pending)} already done) "
+          f"with {workers} workers")
+
+    failed = []
+    written = set()
+    total_slots = 0
+    from transport import Transport
+
+    http_session = requests.Session()
+    # Pool connections per worker so threads don't queue on a single socket
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    http_session.mount("https://", adapter)
+    session = Transport.from_env(session=http_session)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_fetch_and_parse, location, session, start_date, end_date): location
+            for location in pending
+        }
+        for future in as_completed(futures):
+            location = futures[future]
+            try:
+                location_info, slots = future.result()
+            except Exception as e:
+                print(f"  ✗ {location['name']}: {e}")
+                failed.append(location["location_id"])
+                continue
+            if location_info is None:
+                print(f"  ✗ {location['name']}: failed to fetch")
+                failed.append(location["location_id"])
+                continue
+
+            if renew_lease and not renew_lease():
+                print("  ✗ Lost the availability lease to another scraper; stopping")
+                executor.shutdown(wait=False, cancel_futures=True)
+                # Everything not written yet is retried by the next run
+                failed.extend(
+                    other["location_id"] for other in pending
+                    if other["location_id"] not in written and other["location_id"] not in failed
+                )
+                break
+            sink.write([location_info], slots)
+            written.add(location["location_id"])
+            total_slots += len(slots)
+            if checkpoint:
+                position = sink.position() if hasattr(sink, "position") else None
+                checkpoint.mark_done(location["location_id"], len(slots), position)
+            print(f"  ✓ {location['name']}: {len(slots)} slots")
+
+    session.close()
+    return {
+        "completed": len(written),
+        "skipped": len(locations) - len(pending),
+        "failed": failed,
+        "slots_written": total_slots,
+        "requests": session.limiter.take_metrics() if session.limiter else None,
+    }
+
+
+def cmd_scrape(args):
+    from scraper import scrape_all_locations
+
+    profiler = None
+    if args.profile_memory:
+        from profiling import ScrapeProfiler
+
+        profiler = ScrapeProfiler(top_allocations=5)
+        profiler.start()
+    locations, slots = scrape_all_locations(start_date=args.start_date, end_date=args.end_date,
+                                            profiler=profiler)
+    if profiler:
+        profiler.stop()
+        profiler.report()
+    data = {
+        "scraped_at": datetime.now().isoformat(),
+        "total_locations": len(locations),
+        "total_slots": len(slots),
+        "locations": locations,
+        "availability": slots,
+    }
+    if args.snapshot_dir:
+        from snapshots import write_snapshot
+
+        rows = write_snapshot(slots, args.snapshot_dir, fmt=args.snapshot_format)
+        print(f"💾 Wrote {rows} slots to {args.snapshot_format} snapshot in {args.snapshot_dir}")
+        if not args.output:
+            return
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f)
+        print(f"💾 Saved {len(slots)} slots to {args.output}")
+    else:
+        json.dump(data, sys.stdout)
+
+
+def cmd_store(args):
+    from coordination import AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS, run_lease
+    from dotenv import load_dotenv
+    from scraper import COURT_CONFIGS, scrape_all_locations
+    from storage import SupabaseStore
+
+    load_dotenv()
+    store = SupabaseStore()
+    with run_lease(store, AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS) as held:
+        if not held:
+            print(f"Another scraper holds the {AVAILABILITY_LEASE} lease; try again once it finishes",
+                  file=sys.stderr)
+            sys.exit(1)
+        locations, slots = scrape_all_locations()
+        store.store_locations(locations)
+        store.store_courts(COURT_CONFIGS)
+        store.replace_availability(slots)
+
+
+def cmd_backfill(args):
+    locations = _select_locations(args.locations)
+    checkpoint = Checkpoint(args.checkpoint, {
+        "locations": [location["location_id"] for location in locations],
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "sink": args.sink,
+    })
+    if args.fresh:
+        print("Ignoring any existing checkpoint")
+    elif checkpoint.load():
+        print(f"Resuming from {args.checkpoint} ({len(checkpoint.completed)} locations done)")
+
+    started = time.perf_counter()
+    sink = _make_sink(args.sink)
+    if args.sink != "supabase":
+        summary = backfill(locations, sink, args.workers, args.start_date, args.end_date, checkpoint)
+    else:
+        from coordination import AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS, default_owner, run_lease
+        from scraper import COURT_CONFIGS
+
+        # Writes the same tables as the scheduled scrape, so hold its lease,
+        # renewing it per location since a backfill can outlast the TTL
+        owner = default_owner()
+        with run_lease(sink, AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS, owner) as held:
+            if not held:
+                print(f"Another scraper holds the {AVAILABILITY_LEASE} lease; try again once it finishes",
+                      file=sys.stderr)
+                sys.exit(1)
+            summary = backfill(locations, sink, args.workers, args.start_date, args.end_date, checkpoint,
+                               lambda: sink.acquire(AVAILABILITY_LEASE, owner, RUN_LEASE_TTL_SECONDS))
+            sink.store_courts(COURT_CONFIGS)
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    print(f"\nBackfill finished: {summary}")
+    if summary["failed"]:
+        print("Re-run the same command to retry failed locations")
+        sys.exit(1)
+
+
+def cmd_bench(args):
+    from scraper import fetch_location_data, parse_location_data
+    from transport import default_transport
+
+    locations = _select_locations(args.locations)
+    raw = []
+    fetch_started = time.perf_counter()
+    for location in locations:
+        data = fetch_location_data(location["location_id"])
+        if data:
+            raw.append(data)
+    fetch_seconds = time.perf_counter() - fetch_started
+
+    parse_started = time.perf_counter()
+    slot_count = 0
+    for _ in range(args.repeat):
+        slot_count = 0
+        for data in raw:
+            _, slots = parse_location_data(data)
+            slot_count += len(slots)
+    parse_seconds = (time.perf_counter() - parse_started) / args.repeat
+
+    print(f"Locations fetched: {len(raw)}/{len(locations)}")
+    print(f"Fetch:  {fetch_seconds * 1000:8.1f} ms total, {fetch_seconds * 1000 / max(len(raw), 1):6.1f} ms/location")
+    print(f"Parse:  {parse_seconds * 1000:8.1f} ms total ({slot_count} slots, mean of {args.repeat} runs)")
+    limiter = default_transport().limiter
+    if limiter:
+        print(f"Requests: {limiter.take_metrics()}")
+    cache = default_transport().cache
+    if cache:
+        # Only with REC_FETCH_CACHE_TTL set; hits make the fetch timings above meaningless
+        print(f"Fetch cache: {cache.take_metrics()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SF RecPark court scraper")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape = subparsers.add_parser("scrape", help="Scrape all locations")
+    scrape.add_argument("--output", "-o", help="Write JSON here instead of stdout")
+    scrape.add_argument("--start-date", help="Only keep slots on or after YYYY-MM-DD")
+    scrape.add_argument("--end-date", help="Only keep slots on or before YYYY-MM-DD")
+    scrape.add_argument("--profile-memory", action="store_true",
+                        help="Report tracemalloc/RSS memory per pipeline stage")
+    scrape.add_argument("--snapshot-dir", help="Also append a columnar snapshot here (needs pyarrow)")
+    scrape.add_argument("--snapshot-format", choices=["arrow", "parquet"], default="arrow")
+    scrape.set_defaults(func=cmd_scrape)
+
+    store = subparsers.add_parser("store", help="Scrape and replace the data in Supabase")
+    store.set_defaults(func=cmd_store)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Parallel, resumable bulk load")
+    backfill_parser.add_argument("--locations", nargs="+", help="Slugs or IDs (default: all)")
+    backfill_parser.add_argument("--start-date", help="Only keep slots on or after YYYY-MM-DD")
+    backfill_parser.add_argument("--end-date", help="Only keep slots on or before YYYY-MM-DD")
+    backfill_parser.add_argument("--workers", type=int, default=8)
+    backfill_parser.add_argument("--sink", default="supabase",
+                                 help="'supabase', 'jsonl:<path>', 'arrow:<dir>' or 'parquet:<dir>'")
+    backfill_parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    backfill_parser.add_argument("--fresh", action="store_true", help="Ignore an existing checkpoint")
+    backfill_parser.set_defaults(func=cmd_backfill)
+
+    bench = subparsers.add_parser("bench", help="Time fetch and parse stages")
+    bench.add_argument("--locations", nargs="+", help="Slugs or IDs (default: all)")
+    bench.add_argument("--repeat", type=int, default=5, help="Parse repetitions")
+    bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
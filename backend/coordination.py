@@ -0,0 +1,315 @@
+"""
+Coordination between concurrent scrapers
+The scheduled cron, a manual `modal run`, populate_database.py and debug
+scripts can all run at once. Two things keep them from duplicating work:
+
+- Run leases: a named, expiring lock held around "scrape and write
+  availability". A caller that can't get the lease skips its run instead of
+  racing the holder's truncate/insert. Any object with acquire/release works
+  as the backend: SqliteCoordinator for processes on one machine,
+  storage.SupabaseStore for processes anywhere that write to the same database.
+- An opt-in (REC_FETCH_CACHE_TTL) short-TTL shared fetch cache: concurrent
+  requests for the same rec.us URL share one in-flight fetch, within a process
+  (SingleFlight) and across processes (a per-URL lease plus the cached body).
+
+Usage:
+    with run_lease(store, AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS) as held:
+        if held:
+            ...scrape and write...
+"""
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+
+DEFAULT_COORDINATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "coordination.sqlite3")
+
+# Lease held around every scrape-and-write of the availability table
+AVAILABILITY_LEASE = "availability"
+RUN_LEASE_TTL_SECONDS = 600
+
+# Fetch cache TTL when built without one; FetchCache.from_env only enables the
+# cache when REC_FETCH_CACHE_TTL is set, since a cached response is up to TTL old
+DEFAULT_FETCH_CACHE_TTL = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetch_cache (
+    key TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# (status code, content type, body) of a fetched response
+CachedResponse = Tuple[int, Optional[str], bytes]
+
+
+def default_owner() -> str:
+    """Lease owner ID for this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one
+
+    The first caller for a key runs the function; callers that arrive while it
+    is running block and get the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+
+    def do(self, key: str, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class SqliteCoordinator:
+    """
+    Leases and fetch cache in a local SQLite file (WAL mode)
+
+    Every process on the machine that opens the same path shares both. Lease
+    acquisition is a single conditional upsert, so it is atomic across processes.
+    """
+
+    def __init__(self, path: str = DEFAULT_COORDINATION_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One connection shared by the fetch threads, serialized by self._lock
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew a lease
+
+        Succeeds if the lease is free, expired, or already held by `owner`.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                """
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.expires_at < ? OR leases.owner = excluded.owner
+                """,
+                (name, owner, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, name: str, owner: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def holder(self, name: str) -> Optional[str]:
+        """Owner of an unexpired lease, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT owner FROM leases WHERE name = ? AND expires_at >= ?", (name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def cache_get(self, key: str, max_age: float) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status_code, content_type, body FROM fetch_cache WHERE key = ? AND fetched_at >= ?",
+                (key, time.time() - max_age),
+            ).fetchone()
+        return (row[0], row[1], bytes(row[2])) if row else None
+
+    def cache_put(self, key: str, response: CachedResponse, max_age: float):
+        """Store a response and drop entries older than max_age"""
+        status_code, content_type, body = response
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fetch_cache (key, status_code, content_type, body, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, status_code, content_type, body, now),
+            )
+            self.conn.execute("DELETE FROM fetch_cache WHERE fetched_at < ?", (now - max_age,))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class FetchCache:
+    """
+    Short-TTL response cache with in-flight request coalescing
+
+    get_or_fetch() returns a cached response younger than `ttl`, or runs
+    `fetch` once per key: other threads in this process wait on the same call,
+    and other processes wait on the per-key lease and then read the cached
+    result. Only 200 responses are cached.
+
+    Args:
+        backend: Object with acquire/release/cache_get/cache_put, e.g. SqliteCoordinator
+        ttl: Seconds a cached response stays fresh
+        poll_seconds: How often a waiting process checks for the holder's result
+    """
+
+    def __init__(self, backend, ttl: float = DEFAULT_FETCH_CACHE_TTL, poll_seconds: float = 0.1):
+        self.backend = backend
+        self.ttl = ttl
+        self.poll_seconds = poll_seconds
+        self.owner = default_owner()
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._metrics = self._empty_metrics()
+
+    @classmethod
+    def from_env(cls) -> Optional["FetchCache"]:
+        """
+        Cache at REC_COORDINATION_DB (default data/coordination.sqlite3) with
+        REC_FETCH_CACHE_TTL seconds of freshness; opt-in, so None unless the
+        TTL is set above 0
+        """
+        ttl = float(os.environ.get("REC_FETCH_CACHE_TTL", 0))
+        if ttl <= 0:
+            return None
+        return cls(SqliteCoordinator(os.environ.get("REC_COORDINATION_DB", DEFAULT_COORDINATION_PATH)), ttl)
+
+    @staticmethod
+    def _empty_metrics() -> Dict:
+        return {"hits": 0, "fetches": 0, "coalesced": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def take_metrics(self) -> Dict:
+        """Counters since the last call"""
+        with self._lock:
+            metrics, self._metrics = self._metrics, self._empty_metrics()
+        return metrics
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], CachedResponse],
+                     wait_seconds: float = 10) -> CachedResponse:
+        """
+        Cached response for `key`, fetching it at most once across concurrent callers
+
+        Args:
+            key: Request key (transport.request_key)
+            fetch: Returns (status code, content type, body)
+            wait_seconds: How long to wait on another process's fetch before
+                fetching anyway; also the per-key lease TTL
+        """
+        leader = []
+
+        def run():
+            leader.append(True)
+            return self._get_or_fetch(key, fetch, wait_seconds)
+
+        response = self._flights.do(key, run)
+        if not leader:
+            self._count("coalesced")
+        return response
+
+    def _get_or_fetch(self, key: str, fetch: Callable[[], CachedResponse], wait_seconds: float) -> CachedResponse:
+        cached = self.backend.cache_get(key, self.ttl)
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        lease = f"fetch:{key}"
+        deadline = time.monotonic() + wait_seconds
+        while not self.backend.acquire(lease, self.owner, wait_seconds):
+            # Another process is fetching this URL; use its result when it lands
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_seconds)
+            cached = self.backend.cache_get(key, self.ttl)
+            if cached is not None:
+                self._count("coalesced")
+                return cached
+
+        try:
+            response = fetch()
+            self._count("fetches")
+            if response[0] == 200:
+                self.backend.cache_put(key, response, self.ttl)
+            return response
+        finally:
+            self.backend.release(lease, self.owner)
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close:
+            close()
+
+
+@contextmanager
+def run_lease(backend, name: str, ttl: float, owner: Optional[str] = None) -> Iterator[bool]:
+    """
+    Hold a named lease for the duration of a block
+
+    Yields True if the lease was acquired; the block should skip its work
+    otherwise. The lease is released on exit and expires after `ttl` seconds
+    if the process dies while holding it.
+
+    Args:
+        backend: SqliteCoordinator, storage.SupabaseStore or anything with acquire/release
+        name: Lease name, e.g. "availability"
+        ttl: Longest the block is expected to run
+        owner: Holder ID (default: hostname:pid)
+    """
+    owner = owner or default_owner()
+    held = backend.acquire(name, owner, ttl)
+    try:
+        yield held
+    finally:
+        if held:
+            backend.release(name, owner)
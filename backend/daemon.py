@@ -0,0 +1,262 @@
+"""
+Long-running scrape daemon
+Keeps HTTP and Supabase connections warm and the last scrape in memory,
+looping on an internal scheduler instead of cold-starting every cycle
+
+Run locally with: python daemon.py --interval 60
+"""
+
+import argparse
+import os
+import signal
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from change_events import (
+    ANY, EventSink, FileSink, SubscriptionMatcher, WebhookSink, carry_uncovered, process_scrape,
+)
+from coordination import AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS, run_lease
+from horizon import HorizonScheduler, merge_refresh
+from rate_limit import RequestBudget
+from scraper import COURT_CONFIGS, LOCATIONS, scrape_all_locations
+from transport import Transport
+from utilization import UtilizationTracker
+
+
+# Reload subscriptions from the database at most this often
+SUBSCRIPTION_REFRESH_SECONDS = 300
+
+
+class ScrapeDaemon:
+    """
+    Scrape loop with warm connections and in-memory state
+
+    Args:
+        interval_seconds: Time between cycle starts
+        store: SupabaseStore to write to, or None for a dry run
+        sink: Where change-event deliveries go (defaults to a WebhookSink)
+        horizon: Optional HorizonScheduler; refreshes far-out dates less often than near-term ones
+        budget: Optional RequestBudget; when the rate limiter can't cover every location in
+            one interval, lower-priority locations keep their previous slots until a later cycle
+        analytics: Optional UtilizationTracker fed every cycle's slots
+        analytics_path: Where to save the tracker after each cycle
+    """
+
+    def __init__(self, interval_seconds: float = 60, store=None, sink: Optional[EventSink] = None,
+                 horizon: Optional[HorizonScheduler] = None, budget: Optional[RequestBudget] = None,
+                 analytics: Optional[UtilizationTracker] = None, analytics_path: Optional[str] = None):
+        import requests
+
+        self.interval_seconds = interval_seconds
+        self.store = store
+        self.sink = sink or WebhookSink(os.environ.get("ALERT_WEBHOOK_URL"))
+        # REC_TRANSPORT=replay runs the daemon against recorded responses
+        self.session = Transport.from_env(session=requests.Session())
+        if self.session.cache and self.session.cache.ttl >= interval_seconds:
+            # A response cached by one cycle must not be served to the next
+            self.session.cache.ttl = interval_seconds / 2
+            print(f"Fetch cache TTL lowered to {self.session.cache.ttl:g}s (below the {interval_seconds:g}s interval)")
+        self.horizon = horizon
+        self.budget = budget
+        self.analytics = analytics
+        self.analytics_path = analytics_path
+        self.last_slots: Optional[List[Dict]] = None
+        self.last_locations: List[Dict] = []
+        # What change events are diffed against: last_slots plus the slots of
+        # locations that weren't fetched since they were last seen
+        self.event_slots: Optional[List[Dict]] = None
+        self.cycles = 0
+        self._matcher: Optional[SubscriptionMatcher] = None
+        self._matcher_loaded_at = 0.0
+        self._stopping = False
+
+    def stop(self, *_):
+        """Finish the current cycle and exit the loop"""
+        self._stopping = True
+
+    def _subscriptions(self) -> SubscriptionMatcher:
+        now = time.monotonic()
+        if self._matcher is None or now - self._matcher_loaded_at > SUBSCRIPTION_REFRESH_SECONDS:
+            subscriptions = self.store.load_subscriptions() if self.store else []
+            self._matcher = SubscriptionMatcher(subscriptions)
+            self._matcher_loaded_at = now
+        return self._matcher
+
+    def _plan_locations(self):
+        # Without previous state there is nothing to fall back on, so the
+        # first cycle always fetches everything
+        limiter = self.session.limiter
+        if not self.budget or not limiter or self.last_slots is None:
+            return LOCATIONS, []
+        try:
+            subscribed = {key[0] for key in self._subscriptions().index} - {ANY}
+        except Exception as e:
+            # Subscriptions only set priorities; plan without them rather than skip the cycle
+            print(f"⚠️  Warning: Error loading subscriptions, planning without priorities: {e}")
+            subscribed = set()
+        selected, dropped = self.budget.plan(LOCATIONS, limiter.rate, self.interval_seconds, subscribed)
+        if dropped:
+            print(f"⚠️  Request budget covers {len(selected)}/{len(LOCATIONS)} locations "
+                  f"at {limiter.rate:.2f} req/s; deferring {len(dropped)}")
+        return selected, dropped
+
+    def _carry_over(self, locations: List[Dict], slots: List[Dict], dropped: List[Dict]):
+        # Deferred locations keep their previous (unexpired) slots and location rows
+        if not dropped:
+            return locations, slots
+        dropped_ids = {location["location_id"] for location in dropped}
+        today = date.today().isoformat()
+        carried_slots = [
+            slot for slot in self.last_slots
+            if slot["location_id"] in dropped_ids and slot["date"] >= today
+        ]
+        carried_locations = [location for location in self.last_locations if location["id"] in dropped_ids]
+        return locations + carried_locations, slots + carried_slots
+
+    def run_cycle(self) -> Dict:
+        """
+        Run one scrape, store it and emit change events against the previous cycle
+
+        With a store, the cycle holds the availability lease; if another
+        scraper (e.g. the cron job) holds it, the cycle is skipped.
+
+        Returns:
+            Summary dict for the cycle
+        """
+        if self.store is None:
+            return self._run_cycle()
+        with run_lease(self.store, AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS) as held:
+            if held:
+                return self._run_cycle()
+        print(f"Cycle skipped: another scraper holds the {AVAILABILITY_LEASE} lease")
+        return {"cycle": self.cycles, "skipped": True, "timestamp": datetime.now().isoformat()}
+
+    def _run_cycle(self) -> Dict:
+        started = time.perf_counter()
+        selected, dropped = self._plan_locations()
+        if self.horizon and self.last_slots is not None:
+            start_date, end_date, ranges = self.horizon.plan(self.cycles)
+            locations, fresh_slots = scrape_all_locations(self.session, start_date, end_date,
+                                                          locations=selected)
+            if fresh_slots:
+                locations, fresh_slots = self._carry_over(locations, fresh_slots, dropped)
+                # Locations that failed to fetch keep their previous slots
+                slots = merge_refresh(self.last_slots, fresh_slots, ranges,
+                                      location_ids=[location["id"] for location in locations])
+            else:
+                slots = []
+        else:
+            # First cycle (or no horizon): parse everything
+            locations, slots = scrape_all_locations(self.session, locations=selected)
+            if slots:
+                locations, slots = self._carry_over(locations, slots, dropped)
+        scraped = time.perf_counter()
+
+        if self.store:
+            self.store.store_locations(locations)
+            # Court rows are only rewritten when a court's config changed
+            self.store.store_courts(COURT_CONFIGS)
+            self.store.replace_availability(slots)
+        stored = time.perf_counter()
+
+        events = None
+        if slots:
+            # Deferred locations were carried over and failed ones are missing;
+            # neither was observed this cycle
+            dropped_ids = {location["location_id"] for location in dropped}
+            fetched_ids = [location["id"] for location in locations if location["id"] not in dropped_ids]
+            if self.event_slots is not None:
+                try:
+                    events = process_scrape(self.event_slots, slots, self._subscriptions(), self.sink,
+                                            location_ids=fetched_ids)
+                except Exception as e:
+                    print(f"⚠️  Warning: Error processing change events: {e}")
+                self.event_slots = carry_uncovered(self.event_slots, slots, fetched_ids)
+            else:
+                self.event_slots = slots
+            # Keep the previous state if a scrape came back empty
+            self.last_slots = slots
+            self.last_locations = locations
+            if self.analytics:
+                self.analytics.observe(slots, location_ids=fetched_ids)
+                if self.analytics_path:
+                    self.analytics.save(self.analytics_path)
+
+        self.cycles += 1
+        summary = {
+            "cycle": self.cycles,
+            "locations_processed": len(locations),
+            "slots_processed": len(slots),
+            "scrape_seconds": round(scraped - started, 2),
+            "store_seconds": round(stored - scraped, 2),
+            "events": events,
+            "locations_deferred": len(dropped),
+            "requests": self.session.limiter.take_metrics() if self.session.limiter else None,
+            "fetch_cache": self.session.cache.take_metrics() if self.session.cache else None,
+            "timestamp": datetime.now().isoformat(),
+        }
+        print(f"Cycle {self.cycles}: {summary}")
+        return summary
+
+    def run(self, max_cycles: Optional[int] = None, max_seconds: Optional[float] = None):
+        """
+        Loop until stopped, max_cycles is reached or max_seconds has elapsed
+
+        Cycles start on a fixed cadence; a cycle that overruns the interval is
+        followed immediately by the next one rather than queuing up missed ticks.
+        """
+        started = time.monotonic()
+        next_run = started
+        while not self._stopping:
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                break
+
+            try:
+                self.run_cycle()
+            except Exception as e:
+                print(f"❌ Cycle failed: {e}")
+
+            next_run = max(next_run + self.interval_seconds, time.monotonic())
+            while not self._stopping and time.monotonic() < next_run:
+                time.sleep(min(1.0, next_run - time.monotonic()))
+
+        self.session.close()
+        print(f"Daemon stopped after {self.cycles} cycles")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the court scraper as a long-lived daemon")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between cycles")
+    parser.add_argument("--cycles", type=int, help="Stop after this many cycles")
+    parser.add_argument("--dry-run", action="store_true", help="Scrape without writing to Supabase")
+    parser.add_argument("--events-file", help="Write change events to this JSONL file instead of webhooks")
+    parser.add_argument("--full-horizon", action="store_true",
+                        help="Re-parse every date each cycle instead of tiered near/far refresh")
+    parser.add_argument("--max-requests", type=int,
+                        help="Cap on rec.us requests per cycle (default: what the rate limit allows)")
+    parser.add_argument("--analytics-state", help="Track utilization and save it to this file every cycle")
+    args = parser.parse_args()
+
+    store = None
+    if not args.dry_run:
+        from dotenv import load_dotenv
+        from storage import SupabaseStore
+
+        load_dotenv()
+        store = SupabaseStore()
+
+    sink = FileSink(args.events_file) if args.events_file else None
+    horizon = None if args.full_horizon else HorizonScheduler()
+    analytics = UtilizationTracker.load(args.analytics_state) if args.analytics_state else None
+    daemon = ScrapeDaemon(args.interval, store, sink, horizon, RequestBudget(args.max_requests),
+                          analytics, args.analytics_state)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run(max_cycles=args.cycles)
+
+
+if __name__ == "__main__":
+    main()
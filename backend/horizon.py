@@ -0,0 +1,104 @@
+"""
+Booking-horizon refresh planning
+Near-term dates are re-parsed every cycle, far-out dates only every few cycles
+
+rec.us has no documented date-range parameters on the locations endpoint, so
+the response still covers the whole horizon; the savings come from truncating
+availableSlots before parsing and from not rewriting far-out dates every cycle.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# days are offsets from today (inclusive); None means "to the end of the horizon"
+DEFAULT_TIERS = [
+    {"name": "near", "days": (0, 2), "every_cycles": 1},
+    {"name": "mid", "days": (3, 7), "every_cycles": 3},
+    {"name": "far", "days": (8, None), "every_cycles": 12},
+]
+
+# rec.us releases reservations a few weeks out; used to bound the open-ended tier
+MAX_HORIZON_DAYS = 60
+
+
+class HorizonScheduler:
+    """
+    Decides which date ranges to refresh on a given cycle
+
+    Cycle 0 refreshes every tier, so the first scrape is always complete.
+
+    Args:
+        tiers: List of {"name", "days": (first_offset, last_offset or None), "every_cycles"}
+        max_days: Upper bound for open-ended tiers
+    """
+
+    def __init__(self, tiers: Optional[List[Dict]] = None, max_days: int = MAX_HORIZON_DAYS):
+        self.tiers = tiers or DEFAULT_TIERS
+        self.max_days = max_days
+
+    def due_tiers(self, cycle: int) -> List[Dict]:
+        """Tiers to refresh on this cycle"""
+        return [tier for tier in self.tiers if cycle % tier["every_cycles"] == 0]
+
+    def plan(self, cycle: int, today: Optional[date] = None) -> Tuple[str, str, List[Tuple[str, str]]]:
+        """
+        Work out what to parse this cycle
+
+        Args:
+            cycle: Zero-based cycle counter
+            today: Reference date (defaults to date.today())
+
+        Returns:
+            Tuple of (start_date, end_date, ranges): the overall window to pass to
+            the scraper and the list of ("YYYY-MM-DD", "YYYY-MM-DD") ranges refreshed
+        """
+        today = today or date.today()
+        ranges = []
+        for tier in self.due_tiers(cycle):
+            first, last = tier["days"]
+            last = self.max_days if last is None else last
+            ranges.append((
+                (today + timedelta(days=first)).isoformat(),
+                (today + timedelta(days=last)).isoformat(),
+            ))
+        ranges.sort()
+        return ranges[0][0], max(end for _, end in ranges), ranges
+
+
+def _in_ranges(slot_date: str, ranges: Iterable[Tuple[str, str]]) -> bool:
+    return any(start <= slot_date <= end for start, end in ranges)
+
+
+def merge_refresh(previous_slots: List[Dict], fresh_slots: List[Dict],
+                  ranges: List[Tuple[str, str]], today: Optional[str] = None,
+                  location_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Combine a partial refresh with the previous full state
+
+    Slots on refreshed dates come from fresh_slots; slots on other dates, and
+    all slots of locations this cycle didn't cover (e.g. a failed fetch), are
+    carried over from previous_slots. Dates before today are dropped.
+
+    Args:
+        previous_slots: Slot dicts from the last full state
+        fresh_slots: Slot dicts parsed this cycle (already limited to the plan window)
+        ranges: Date ranges refreshed this cycle (from HorizonScheduler.plan)
+        today: "YYYY-MM-DD" cutoff for expired slots (defaults to date.today())
+        location_ids: Locations this cycle covered; defaults to the locations
+            present in fresh_slots
+
+    Returns:
+        Merged slot list
+    """
+    today = today or date.today().isoformat()
+    if location_ids is None:
+        location_ids = {slot["location_id"] for slot in fresh_slots}
+    covered = set(location_ids)
+    carried = [
+        slot for slot in previous_slots
+        if slot["date"] >= today
+        and (slot["location_id"] not in covered or not _in_ranges(slot["date"], ranges))
+    ]
+    refreshed = [slot for slot in fresh_slots if _in_ranges(slot["date"], ranges)]
+    return carried + refreshed
@@ -1,24 +1,19 @@
 #!/usr/bin/env python3
 """
 Inspect court data to find field that indicates tennis vs pickleball
+Honors REC_TRANSPORT=record/replay like the scraper (see transport.py)
 """
-import requests
 import json
 
+from scraper import fetch_location_data
+
 # Crocker Amazon location ID (has both tennis and pickleball)
 location_id = '779905bd-4c2b-45b3-abd0-48140998bca1'
-url = f'https://api.rec.us/v1/locations/{location_id}?publishedSites=true'
-
-headers = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-    "Accept": "application/json",
-    "Origin": "https://www.rec.us",
-    "Referer": "https://www.rec.us/",
-}
 
 print("Fetching Crocker Amazon court data...")
-response = requests.get(url, headers=headers)
-data = response.json()
+data = fetch_location_data(location_id)
+if data is None:
+    raise SystemExit("Failed to fetch location data")
 
 print("\nFull response:")
 print(json.dumps(data, indent=2)[:1000])  # Print first 1000 chars
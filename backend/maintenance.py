@@ -0,0 +1,62 @@
+"""
+Availability table maintenance
+Creates upcoming daily partitions ahead of time and drops expired ones
+
+Run daily (Modal schedules it via modal_service.maintain_partitions) or manually:
+    python maintenance.py --days-ahead 60 --retain-days 0
+"""
+
+import argparse
+from typing import Dict
+
+
+# rec.us releases reservations a few weeks out; keep partitions ready well past that
+DEFAULT_DAYS_AHEAD = 60
+
+# Days of history to keep before dropping a partition (0 = drop everything before today)
+DEFAULT_RETAIN_DAYS = 0
+
+
+def maintain_partitions(store, days_ahead: int = DEFAULT_DAYS_AHEAD,
+                        retain_days: int = DEFAULT_RETAIN_DAYS) -> Dict:
+    """
+    Create future availability partitions and drop expired ones
+
+    Args:
+        store: storage.SupabaseStore
+        days_ahead: Number of days from today to pre-create partitions for
+        retain_days: Days of past partitions to keep
+
+    Returns:
+        Dict with the number of partitions created and dropped (both None if the
+        database has no partition functions, e.g. an unpartitioned availability table)
+    """
+    from storage import missing_function
+
+    try:
+        created = store.client.rpc("create_availability_partitions", {"days_ahead": days_ahead}).execute().data
+        dropped = store.client.rpc("drop_expired_availability_partitions", {"retain_days": retain_days}).execute().data
+    except Exception as e:
+        if not missing_function(e):
+            raise
+        print(f"⚠️  Partition functions unavailable ({e}), skipping partition maintenance")
+        return {"created": None, "dropped": None}
+    print(f"✓ Partitions: {created} created, {dropped} dropped")
+    return {"created": created, "dropped": dropped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain availability partitions")
+    parser.add_argument("--days-ahead", type=int, default=DEFAULT_DAYS_AHEAD)
+    parser.add_argument("--retain-days", type=int, default=DEFAULT_RETAIN_DAYS)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from storage import SupabaseStore
+
+    load_dotenv()
+    maintain_partitions(SupabaseStore(), args.days_ahead, args.retain_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Reference implementation of the get_available_courts RPC
+Mirrors supabase/migrations/20251127000000_get_available_courts_single_scan.sql so the
+grouping, dedupe and ordering the map relies on can be checked in Python
+"""
+
+from typing import Dict, List, Optional
+
+
+# Fields of each slot returned to the frontend
+SLOT_FIELDS = ["time", "duration_minutes", "court_type", "price_cents"]
+
+LOCATION_FIELDS = [
+    "id", "name", "address", "lat", "lng", "hours_of_operation", "description", "created_at", "updated_at",
+]
+
+
+def _nulls_last(value):
+    # Postgres sorts NULLs after every other value in ascending order
+    return (value is None, value if value is not None else 0)
+
+
+def get_available_courts(locations: List[Dict], slots: List[Dict], date: str,
+                         sport: Optional[str] = None) -> List[Dict]:
+    """
+    Group available slots by location, deduplicated and sorted the way the map renders them
+
+    Args:
+        locations: Rows from the locations table (or scraper location dicts)
+        slots: Rows from the availability table (or scraper slot dicts)
+        date: "YYYY-MM-DD"
+        sport: Optional court_type filter; None for both
+
+    Returns:
+        One dict per location sorted by name, with "available_slots" holding one
+        entry per (court_type, time, duration_minutes), sorted by time
+    """
+    # (location_id, court_type, time, duration) -> cheapest matching slot
+    unique: Dict[tuple, Dict] = {}
+    for slot in slots:
+        if slot["date"] != date or not slot.get("is_available", True):
+            continue
+        if sport is not None and slot.get("court_type") != sport:
+            continue
+        key = (slot["location_id"], slot.get("court_type"), slot["time"], slot.get("duration_minutes"))
+        current = unique.get(key)
+        if current is None or _nulls_last(slot.get("price_cents")) < _nulls_last(current.get("price_cents")):
+            unique[key] = slot
+
+    by_location: Dict[str, List[Dict]] = {}
+    for (location_id, _, _, _), slot in unique.items():
+        by_location.setdefault(location_id, []).append({field: slot.get(field) for field in SLOT_FIELDS})
+
+    result = []
+    for location in sorted(locations, key=lambda loc: loc["name"]):
+        location_slots = by_location.get(location["id"], [])
+        location_slots.sort(key=lambda s: (
+            s["time"], _nulls_last(s["court_type"]), _nulls_last(s["duration_minutes"])
+        ))
+        row = {field: location.get(field) for field in LOCATION_FIELDS}
+        row["available_slots"] = location_slots
+        result.append(row)
+    return result
@@ -15,19 +15,44 @@ app = modal.App("sf-court-scraper")
 # Get the directory containing this file (backend/)
 backend_dir = Path(__file__).parent
 
+# The location catalog built by `catalog.py discover`; without it the scraper covers only the SF seeds
+CATALOG_FILE = backend_dir / "data" / "catalog.sqlite3"
+REMOTE_CATALOG_FILE = "/root/data/catalog.sqlite3"
+
 image = (
     modal.Image.debian_slim()
     .pip_install(
         "requests",
         "supabase",
     )
+    # REC_CATALOG_SHARDS is read from the deploying shell (empty covers every shard)
+    .env({
+        "REC_CATALOG": REMOTE_CATALOG_FILE,
+        "REC_CATALOG_SHARDS": os.environ.get("REC_CATALOG_SHARDS", ""),
+    })
     # Copy scraper.py so it can be imported
     .add_local_file(backend_dir / "scraper.py", remote_path="/root/scraper.py")
+    .add_local_file(backend_dir / "transport.py", remote_path="/root/transport.py")
+    .add_local_file(backend_dir / "catalog.py", remote_path="/root/catalog.py")
+    .add_local_file(backend_dir / "rate_limit.py", remote_path="/root/rate_limit.py")
+    .add_local_file(backend_dir / "coordination.py", remote_path="/root/coordination.py")
+    .add_local_file(backend_dir / "utilization.py", remote_path="/root/utilization.py")
+    .add_local_file(backend_dir / "availability_bitmap.py", remote_path="/root/availability_bitmap.py")
+    .add_local_file(backend_dir / "change_events.py", remote_path="/root/change_events.py")
+    .add_local_file(backend_dir / "storage.py", remote_path="/root/storage.py")
+    .add_local_file(backend_dir / "daemon.py", remote_path="/root/daemon.py")
+    .add_local_file(backend_dir / "horizon.py", remote_path="/root/horizon.py")
+    .add_local_file(backend_dir / "maintenance.py", remote_path="/root/maintenance.py")
 )
+if CATALOG_FILE.exists():
+    image = image.add_local_file(CATALOG_FILE, remote_path=REMOTE_CATALOG_FILE)
 
 # Supabase configuration (using custom-secret that contains all secrets)
 CUSTOM_SECRET = modal.Secret.from_name("custom-secret")
 
+# Last scrape's slots, kept between runs so each scrape can be diffed into change events
+SCRAPE_STATE = modal.Dict.from_name("sf-court-scraper-state", create_if_missing=True)
+
 
 @app.function(
     image=image,
@@ -42,71 +67,64 @@ def scrape_and_store():
     import sys
     sys.path.insert(0, "/root")
     
-    from scraper import scrape_all_locations
-    from supabase import create_client, Client
-
-    # Initialize Supabase client
-    supabase_url = os.environ["SUPABASE_URL"]
-    supabase_key = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
-    supabase: Client = create_client(supabase_url, supabase_key)
-
-    print(f"Starting scrape at {datetime.now()}")
-
-    # Scrape all locations using the scraper module
-    locations, slots = scrape_all_locations()
-
-    # Store in Supabase
-    try:
-        # Store locations (upsert to update if exists)
-        if locations:
-            result = supabase.table("locations").upsert(locations).execute()
-            print(f"Successfully stored {len(locations)} locations")
-
-        # Replace all availability data with latest scrape
-        # Strategy: Delete all old data, then insert new data
-        # This ensures we only show data from the latest scrape
+    from scraper import COURT_CONFIGS, scrape_all_locations
+    from change_events import SubscriptionMatcher, WebhookSink, carry_uncovered, process_scrape
+    from coordination import AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS, run_lease
+    from storage import SupabaseStore
+
+    store = SupabaseStore()
+
+    # Only one scraper writes availability at a time (cron, manual runs, the daemon)
+    with run_lease(store, AVAILABILITY_LEASE, RUN_LEASE_TTL_SECONDS) as held:
+        if not held:
+            print(f"Skipping scrape: another run holds the {AVAILABILITY_LEASE} lease")
+            return {"status": "skipped", "timestamp": datetime.now().isoformat()}
+
+        print(f"Starting scrape at {datetime.now()}")
+
+        # Court fingerprints from the last run, so only changed courts are rewritten
+        COURT_CONFIGS.load_fingerprints(SCRAPE_STATE.get("court_fingerprints"))
+
+        # Scrape all locations using the scraper module
+        locations, slots = scrape_all_locations()
+
+        # Store in Supabase
+        try:
+            store.store_locations(locations)
+            store.store_courts(COURT_CONFIGS)
+            store.replace_availability(slots)
+        except Exception as e:
+            print(f"Error storing data: {e}")
+            raise
+        SCRAPE_STATE["court_fingerprints"] = COURT_CONFIGS.fingerprints()
+
+        # Emit slot opened/taken alerts for anyone subscribed
         if slots:
-            print(f"Replacing all availability data with {len(slots)} slots from latest scrape...")
-            
-            # Step 1: Delete all existing availability data
-            # We only do this if we have new data to insert (ensures DB is never empty)
-            print("Deleting all existing availability data...")
             try:
-                # Delete all records using a condition that matches everything
-                # Using gte on created_at with a very old date matches all records
-                supabase.table("availability").delete().gte("created_at", "1970-01-01").execute()
-                print("  ✓ Deleted all existing availability records")
+                # Locations whose fetch failed are left out of the diff
+                fetched_ids = [location["id"] for location in locations]
+                previous_slots = SCRAPE_STATE.get("slots")
+                baseline = slots
+                if previous_slots is not None:
+                    summary = process_scrape(
+                        previous_slots,
+                        slots,
+                        SubscriptionMatcher(store.load_subscriptions()),
+                        WebhookSink(os.environ.get("ALERT_WEBHOOK_URL")),
+                        location_ids=fetched_ids,
+                    )
+                    print(f"Change events: {summary}")
+                    baseline = carry_uncovered(previous_slots, slots, fetched_ids)
+                SCRAPE_STATE["slots"] = baseline
             except Exception as e:
-                print(f"  ⚠️  Warning: Error deleting old data (may not exist): {e}")
-            
-            # Step 2: Insert all new availability data from latest scrape
-            # Note: Supabase has a limit on batch operations, so we'll chunk it
-            chunk_size = 1000
-            total_inserted = 0
-            for i in range(0, len(slots), chunk_size):
-                chunk = slots[i:i + chunk_size]
-                try:
-                    supabase.table("availability").insert(chunk).execute()
-                    total_inserted += len(chunk)
-                    print(f"  Inserted {len(chunk)} slots (batch {i // chunk_size + 1}/{(len(slots) + chunk_size - 1) // chunk_size})")
-                except Exception as e:
-                    print(f"  ❌ Error inserting batch {i // chunk_size + 1}: {e}")
-                    raise  # Re-raise to ensure we know if insertion failed
-            
-            print(f"✅ Successfully replaced all availability data with {total_inserted} slots from latest scrape")
-        else:
-            print("⚠️  No availability data found in scrape - keeping existing data to avoid empty database")
-
-    except Exception as e:
-        print(f"Error storing data: {e}")
-        raise
-
-    return {
-        "status": "success",
-        "locations_processed": len(locations),
-        "slots_processed": len(slots),
-        "timestamp": datetime.now().isoformat()
-    }
+                print(f"⚠️  Warning: Error processing change events: {e}")
+
+        return {
+            "status": "success",
+            "locations_processed": len(locations),
+            "slots_processed": len(slots),
+            "timestamp": datetime.now().isoformat()
+        }
 
 
 @app.function(
@@ -121,6 +139,58 @@ def scheduled_scrape():
     return scrape_and_store.remote()
 
 
+@app.function(
+    image=image,
+    secrets=[CUSTOM_SECRET],
+    schedule=modal.Cron("0 8 * * *"),  # Daily, shortly after midnight Pacific
+)
+def maintain_partitions():
+    """
+    Create upcoming availability partitions and drop expired ones
+    """
+    import sys
+    sys.path.insert(0, "/root")
+
+    from maintenance import maintain_partitions as run_maintenance
+    from storage import SupabaseStore
+
+    return run_maintenance(SupabaseStore())
+
+
+# Modal's maximum function timeout
+DAEMON_TIMEOUT_SECONDS = 24 * 60 * 60
+
+
+@app.function(
+    image=image,
+    secrets=[CUSTOM_SECRET],
+    timeout=DAEMON_TIMEOUT_SECONDS,
+)
+def run_daemon(interval_seconds: int = 60):
+    """
+    Long-running alternative to scheduled_scrape
+    Keeps the Supabase client, HTTP session and last scrape in memory and
+    loops until shortly before the function timeout
+    """
+    import sys
+    sys.path.insert(0, "/root")
+
+    from daemon import ScrapeDaemon
+    from horizon import HorizonScheduler
+    from rate_limit import RequestBudget
+    from scraper import COURT_CONFIGS
+    from storage import SupabaseStore
+
+    daemon = ScrapeDaemon(interval_seconds, SupabaseStore(), horizon=HorizonScheduler(), budget=RequestBudget())
+    daemon.last_slots = SCRAPE_STATE.get("slots")
+    COURT_CONFIGS.load_fingerprints(SCRAPE_STATE.get("court_fingerprints"))
+    daemon.run(max_seconds=DAEMON_TIMEOUT_SECONDS - 10 * 60)
+    if daemon.last_slots is not None:
+        SCRAPE_STATE["slots"] = daemon.last_slots
+    SCRAPE_STATE["court_fingerprints"] = COURT_CONFIGS.fingerprints()
+    return {"status": "stopped", "cycles": daemon.cycles}
+
+
 @app.local_entrypoint()
 def main():
     """
@@ -129,3 +199,13 @@ def main():
     """
     result = scrape_and_store.remote()
     print(f"\nScrape completed: {result}")
+
+
+@app.local_entrypoint()
+def daemon(interval: int = 60):
+    """
+    Start the long-running daemon on Modal
+    Run with: modal run modal_service.py::daemon --interval 60
+    """
+    result = run_daemon.remote(interval)
+    print(f"\nDaemon finished: {result}")
@@ -0,0 +1,109 @@
+"""
+Memory profiling for the scrape pipeline
+tracemalloc snapshots per stage plus peak RSS, enabled by passing a
+ScrapeProfiler to scraper.scrape_all_locations
+"""
+
+import sys
+import tracemalloc
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ScrapeProfiler:
+    """
+    Records traced memory at named pipeline stages
+
+    Each checkpoint stores the currently traced bytes, the traced peak since the
+    previous checkpoint and the process's peak RSS. Stage names repeat once per
+    location ("fetch", "parse"); the report aggregates them.
+
+    Args:
+        top_allocations: Keep this many top allocation sites, taken when profiling stops
+    """
+
+    def __init__(self, top_allocations: int = 0):
+        self.top_allocations = top_allocations
+        self.checkpoints: List[Dict] = []
+        self.top_sites: List[str] = []
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self.checkpoint("start")
+
+    def stop(self):
+        self.checkpoint("end")
+        if self.top_allocations:
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:self.top_allocations]
+            self.top_sites = [str(stat) for stat in stats]
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def checkpoint(self, stage: str):
+        """Record memory at the end of a stage"""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.checkpoints.append({
+            "stage": stage,
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "rss_peak_bytes": peak_rss_bytes(),
+        })
+
+    @property
+    def peak_bytes(self) -> int:
+        """Highest traced memory seen across all stages"""
+        return max((c["peak_bytes"] for c in self.checkpoints), default=0)
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Aggregate checkpoints by stage
+
+        Returns:
+            Dict of stage -> {"count", "max_current_bytes", "max_peak_bytes"}
+        """
+        stages: Dict[str, Dict] = {}
+        for c in self.checkpoints:
+            stage = stages.setdefault(c["stage"], {"count": 0, "max_current_bytes": 0, "max_peak_bytes": 0})
+            stage["count"] += 1
+            stage["max_current_bytes"] = max(stage["max_current_bytes"], c["current_bytes"])
+            stage["max_peak_bytes"] = max(stage["max_peak_bytes"], c["peak_bytes"])
+        return stages
+
+    def report(self):
+        mb = 1024 * 1024
+        print(f"\n{'stage':<10} {'count':>6} {'current MB':>11} {'peak MB':>9}")
+        for stage, stats in self.summary().items():
+            print(f"{stage:<10} {stats['count']:>6} {stats['max_current_bytes'] / mb:>11.1f} "
+                  f"{stats['max_peak_bytes'] / mb:>9.1f}")
+        print(f"Traced peak: {self.peak_bytes / mb:.1f} MB")
+        rss = peak_rss_bytes()
+        if rss is not None:
+            print(f"Peak RSS:    {rss / mb:.1f} MB")
+        for site in self.top_sites:
+            print(f"  {site}")
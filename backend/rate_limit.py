@@ -0,0 +1,234 @@
+"""
+Request pacing for api.rec.us
+A token bucket shared by every fetch path (it sits inside transport.Transport)
+that slows down on 429 / Retry-After and recovers gradually, plus a per-cycle
+request budget that decides which locations to skip when the rate is too low
+to cover all of them
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Defaults, overridable with REC_RATE_PER_SEC / REC_RATE_BURST
+DEFAULT_RATE_PER_SEC = 5.0
+DEFAULT_BURST = 5
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)
+
+    Returns:
+        Non-negative seconds, or None if the header is missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    # email.utils pulls in re and friends; only needed for the rare HTTP-date form
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket with additive-increase / multiplicative-decrease
+
+    Every request takes a token; tokens refill at `rate` per second up to
+    `burst`. A 429 cuts the rate by `decrease` and pauses all callers until
+    Retry-After has passed; each success adds `increase` back, up to
+    `max_rate`. The rate settles just below where rec.us starts throttling
+    instead of bursting into a ban and backing off to nothing.
+
+    Args:
+        rate: Starting requests per second
+        burst: Bucket size
+        max_rate: Ceiling for recovery (default: the starting rate)
+        min_rate: Floor for backoff
+        increase: Requests/second added back per successful response
+        decrease: Factor applied to the rate on a 429
+        max_retries: Retries of a throttled request before giving up
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_SEC, burst: int = DEFAULT_BURST,
+                 max_rate: Optional[float] = None, min_rate: float = 0.2, increase: float = 0.05,
+                 decrease: float = 0.5, max_retries: int = 3):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._metrics = self._empty_metrics()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        return cls(
+            rate=float(os.environ.get("REC_RATE_PER_SEC", DEFAULT_RATE_PER_SEC)),
+            burst=int(os.environ.get("REC_RATE_BURST", DEFAULT_BURST)),
+        )
+
+    @staticmethod
+    def _empty_metrics() -> Dict:
+        return {"requests": 0, "throttled": 0, "retries": 0, "errors": 0, "wait_seconds": 0.0}
+
+    def _refill(self, now: float):
+        # _updated is in the future while blocked: nothing refills until the block ends
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                # Reserve the token now (possibly going negative) so concurrent
+                # callers queue behind each other instead of all waking at once;
+                # the queue starts where refilling does, i.e. after any block
+                self._tokens -= 1
+                wait = max(self._updated - now, 0.0) + (-self._tokens / self.rate if self._tokens < 0 else 0.0)
+                self._metrics["wait_seconds"] += wait
+                blocked_until = self._blocked_until
+            if wait > 0:
+                time.sleep(wait)
+            # A 429 while this caller slept blocks it too: queue again behind the block
+            with self._lock:
+                if self._blocked_until == blocked_until or self._blocked_until <= time.monotonic():
+                    self._metrics["requests"] += 1
+                    return
+
+    def on_response(self, status_code: int, retry_after: Optional[str] = None) -> bool:
+        """
+        Adapt the rate to a response
+
+        Returns:
+            True if the request was throttled and should be retried
+        """
+        with self._lock:
+            if status_code == 429 or (status_code == 503 and retry_after):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = 1 / self.rate
+                now = time.monotonic()
+                self._refill(now)
+                self._blocked_until = max(self._blocked_until, now + delay)
+                # Drop saved-up burst so the retry doesn't go out with a queue behind it,
+                # and stop refilling until the block ends
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = max(self._updated, self._blocked_until)
+                self._metrics["throttled"] += 1
+                return True
+            if status_code < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            else:
+                self._metrics["errors"] += 1
+            return False
+
+    def note_retry(self):
+        with self._lock:
+            self._metrics["retries"] += 1
+
+    def take_metrics(self) -> Dict:
+        """Counters since the last call, plus the current rate"""
+        with self._lock:
+            metrics, self._metrics = self._metrics, self._empty_metrics()
+            metrics["wait_seconds"] = round(metrics["wait_seconds"], 2)
+            metrics["rate_per_sec"] = round(self.rate, 2)
+        return metrics
+
+
+class RequestBudget:
+    """
+    Per-cycle request allowance and location selection
+
+    The allowance is what the limiter's current rate can sustain over the
+    cycle interval (times `utilization`), optionally capped by `max_requests`.
+    When it can't cover every location, subscribed locations go first and the
+    rest are taken in order of how many cycles they have waited, so skipped
+    locations are picked up on a later cycle.
+
+    Args:
+        max_requests: Hard cap per cycle (None for rate-derived only)
+        utilization: Share of the interval's rate capacity to plan for
+    """
+
+    def __init__(self, max_requests: Optional[int] = None, utilization: float = 0.8):
+        self.max_requests = max_requests
+        self.utilization = utilization
+        self.cycle = 0
+        self._last_fetched: Dict[str, int] = {}
+
+    def limit(self, rate: float, interval_seconds: float) -> int:
+        allowance = int(rate * interval_seconds * self.utilization)
+        if self.max_requests is not None:
+            allowance = min(allowance, self.max_requests)
+        return max(allowance, 1)
+
+    def plan(self, locations: List[Dict], rate: float, interval_seconds: float,
+             priority_ids: Iterable[str] = ()) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Choose the locations to fetch this cycle
+
+        Args:
+            locations: Candidates (scraper.LOCATIONS entries)
+            rate: Current limiter rate (requests/second)
+            interval_seconds: Cycle length
+            priority_ids: Location IDs to fetch first, e.g. ones with subscriptions
+
+        Returns:
+            Tuple of (selected, dropped), each in the original order
+        """
+        self.cycle += 1
+        limit = self.limit(rate, interval_seconds)
+        if limit >= len(locations):
+            selected_ids = {location["location_id"] for location in locations}
+        else:
+            priority = set(priority_ids)
+            ranked = sorted(locations, key=lambda location: (
+                location["location_id"] not in priority,
+                self._last_fetched.get(location["location_id"], -1),
+            ))
+            selected_ids = {location["location_id"] for location in ranked[:limit]}
+
+        selected, dropped = [], []
+        for location in locations:
+            if location["location_id"] in selected_ids:
+                self._last_fetched[location["location_id"]] = self.cycle
+                selected.append(location)
+            else:
+                dropped.append(location)
+        return selected, dropped
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter() -> RateLimiter:
+    """Process-wide limiter, so every Transport paces against the same bucket"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter.from_env()
+        return _shared_limiter
@@ -3,14 +3,23 @@ SF RecPark Court Availability Scraper
 Pure scraping logic without any deployment dependencies
 """
 
-import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import hashlib
+import json
+import sys
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Iterable, List, Dict, Optional, Tuple
+
+# requests is imported lazily in fetch_location_data so the parsing core
+# (and anything that only needs LOCATIONS) imports with just the stdlib
+from catalog import load_locations
+from transport import API_BASE, API_HEADERS, CassetteMissError, default_transport
 
 
 # All 27 SF RecPark court locations from https://sfrecpark.org/1446/Reservable-Tennis-Courts
 # Generated using fetch_location_ids.py
-LOCATIONS = [
+SF_LOCATIONS = [
     {"name": "Alice Marble", "slug": "alicemarble", "location_id": "81cd2b08-8ea6-40ee-8c89-aeba92506576"},
     {"name": "Balboa", "slug": "balboa", "location_id": "c41c7b8f-cb09-415a-b8ea-ad4b82d792b9"},
     {"name": "Buena Vista", "slug": "buenavista", "location_id": "3f842b1e-13f9-447d-ab12-62b62d954d3e"},
@@ -40,8 +49,232 @@ LOCATIONS = [
     {"name": "Upper Noe", "slug": "uppernoe", "location_id": "2a18ef67-333c-4d9c-a86c-e0709f07f5c3"},
 ]
 
+# Locations to scrape: the discovered catalog (catalog.py) if there is one,
+# otherwise the built-in SF list
+LOCATIONS = load_locations(SF_LOCATIONS)
+
+
+# Granularity of rec.us availableSlots
+SLOT_MINUTES = 30
+
+# Share one string per date / time of day across slot rows instead of a copy per
+# row; with ~100k rows per scrape the rows, not the payloads, set peak memory.
+# scripts/bench_memory.py turns it off for its control run.
+INTERN_SLOT_STRINGS = True
+
+
+def build_free_runs(slot_datetimes: Iterable[datetime]) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Merge a court's available 30-minute slots into maximal free runs
+
+    Computed once per court per parse; lookups against it are O(log n).
+
+    Args:
+        slot_datetimes: Parsed start datetimes from a court's availableSlots
+
+    Returns:
+        Dict of "YYYY-MM-DD" -> sorted list of (start_minute, end_minute) runs,
+        where minutes count from midnight and end is exclusive
+    """
+    starts_by_date: Dict[str, List[int]] = {}
+    for dt in slot_datetimes:
+        starts_by_date.setdefault(dt.strftime("%Y-%m-%d"), []).append(dt.hour * 60 + dt.minute)
+
+    runs_by_date = {}
+    for date, starts in starts_by_date.items():
+        runs: List[Tuple[int, int]] = []
+        for minute in sorted(set(starts)):
+            if runs and runs[-1][1] == minute:
+                runs[-1] = (runs[-1][0], minute + SLOT_MINUTES)
+            else:
+                runs.append((minute, minute + SLOT_MINUTES))
+        runs_by_date[date] = runs
+    return runs_by_date
+
+
+def free_minutes_from(runs: List[Tuple[int, int]], minute: int) -> int:
+    """
+    How many minutes stay free starting at a given minute of the day
+
+    Args:
+        runs: Sorted free runs for one court-day (from build_free_runs)
+        minute: Minutes since midnight
+
+    Returns:
+        Contiguous free minutes from minute onwards, 0 if the minute is not free
+    """
+    i = bisect_right(runs, (minute, float("inf"))) - 1
+    if i < 0 or runs[i][1] <= minute:
+        return 0
+    return runs[i][1] - minute
+
+
+def _parse_duration_minutes(value: str, default: int = 30) -> int:
+    """Parse an "HH:MM:SS" duration like maxReservationTime into minutes"""
+    try:
+        # Parse time like "01:30:00" and calculate minutes
+        time_parts = value.split(":")
+        if len(time_parts) >= 2:
+            return int(time_parts[0]) * 60 + int(time_parts[1])
+    except (ValueError, TypeError, AttributeError):
+        pass
+    return default  # Default to 30 minutes if we can't determine
+
+
+# rec.us sport IDs
+TENNIS_SPORT_ID = "bd745b6e-1dd6-43e2-a69f-06f094808a96"
+PICKLEBALL_SPORT_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+
+def config_fingerprint(court: Dict) -> str:
+    """
+    sha1 of the parts of a court that compile_court_config reads
+
+    (config, sports and maxReservationTime). Courts with identical settings
+    share a fingerprint, and so share one compiled config.
+    """
+    subtree = {
+        "config": court.get("config") or {},
+        "sports": court.get("sports") or [],
+        "maxReservationTime": court.get("maxReservationTime"),
+    }
+    return hashlib.sha1(json.dumps(subtree, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def compile_court_config(court: Dict) -> Dict:
+    """
+    Derive a court's slot rules from its config
+
+    Returns:
+        Dict with price_cents, price_type, court_type, max_duration_minutes and
+        fixed_slots_by_day ({weekday: {start "HH:MM:SS": duration minutes}},
+        0=Monday; empty if the court has no fixed-slot policy)
+    """
+    # Get pricing info
+    config = court.get("config") or {}
+    pricing = config.get("pricing", {}).get("default", {})
+
+    # Determine court type from sportId (tennis unless it says pickleball)
+    sports = court.get("sports") or []
+    court_type = "tennis"
+    if sports and sports[0].get("sportId", "") == PICKLEBALL_SPORT_ID:
+        court_type = "pickleball"
+
+    # Extract fixed slot configurations by day of week (to match real website behavior)
+    # The real website only shows slots where the entire duration is available
+    fixed_slots_by_day: Dict[int, Dict[str, int]] = {}
+    for policy in config.get("bookingPolicies", []):
+        if policy.get("type") != "fixed-slots":
+            continue
+        for slot_config in policy.get("slots", []):
+            day_of_week = slot_config.get("dayOfWeek")  # API uses 1=Monday, 2=Tuesday, etc.
+            start_time = slot_config.get("startTimeLocal", "")
+            end_time = slot_config.get("endTimeLocal", "")
+            if start_time and end_time and day_of_week is not None:
+                try:
+                    start_dt = datetime.strptime(start_time, "%H:%M:%S")
+                    end_dt = datetime.strptime(end_time, "%H:%M:%S")
+                except ValueError as e:
+                    # Skip just this policy slot; the rest of the court still parses
+                    print(f"Error parsing fixed slot {start_time}-{end_time}: {e}")
+                    continue
+                # Convert API dayOfWeek (1=Monday) to Python weekday (0=Monday);
+                # the first slot listed for a start time wins
+                fixed_slots_by_day.setdefault(day_of_week - 1, {}).setdefault(
+                    start_time, int((end_dt - start_dt).total_seconds() / 60)
+                )
+
+    return {
+        "price_cents": pricing.get("cents", 0),
+        "price_type": pricing.get("type", "perHour"),
+        "court_type": court_type,
+        # If no fixed slots are configured, the bookable length is maxReservationTime
+        # (default 30), capped by how long the court actually stays free
+        "max_duration_minutes": _parse_duration_minutes(court.get("maxReservationTime", "00:30:00")),
+        "fixed_slots_by_day": fixed_slots_by_day,
+    }
+
+
+class CourtConfigCache:
+    """
+    Compiled court configs keyed by config_fingerprint, plus court change records
+
+    Court settings rarely change, so steady-state parsing only hashes each
+    court's config and reuses the compiled result. A change record is kept
+    whenever a court's fingerprint or name differs from the last one seen;
+    take_changes() hands them to storage, which then rewrites just those
+    courts' metadata.
+
+    Args:
+        max_compiled: Compiled configs kept before the cache is cleared
+    """
 
-def fetch_location_data(location_id: str) -> Optional[Dict]:
+    def __init__(self, max_compiled: int = 4096):
+        self.max_compiled = max_compiled
+        self._compiled: Dict[str, Dict] = {}
+        self._seen: Dict[str, Tuple[str, str]] = {}
+        self._changes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, court: Dict, location_id: str) -> Dict:
+        """Compiled config for a raw rec.us court, recording a change if it differs from last time"""
+        fingerprint = config_fingerprint(court)
+        compiled = self._compiled.get(fingerprint)
+        if compiled is None:
+            compiled = compile_court_config(court)
+            if len(self._compiled) >= self.max_compiled:
+                self._compiled.clear()
+            self._compiled[fingerprint] = compiled
+
+        court_id = court["id"]
+        court_name = court.get("courtNumber", "Unknown Court")
+        seen = (fingerprint, court_name)
+        previous = self._seen.get(court_id)
+        if previous != seen:
+            with self._lock:
+                self._seen[court_id] = seen
+                self._changes[court_id] = {
+                    "id": court_id,
+                    "location_id": location_id,
+                    "court_name": court_name,
+                    "court_type": compiled["court_type"],
+                    "price_cents": compiled["price_cents"],
+                    "price_type": compiled["price_type"],
+                    "max_duration_minutes": compiled["max_duration_minutes"],
+                    "config_fingerprint": fingerprint,
+                    "previous_fingerprint": previous[0] if previous else None,
+                }
+        return compiled
+
+    def take_changes(self) -> List[Dict]:
+        """Change records since the last call, one per changed court"""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        return list(changes.values())
+
+    def forget(self, court_ids: Iterable[str]):
+        """Drop what was seen for these courts, so the next parse records them as changed again"""
+        with self._lock:
+            for court_id in court_ids:
+                self._seen.pop(court_id, None)
+
+    def fingerprints(self) -> Dict[str, List[str]]:
+        """court_id -> [fingerprint, court name] last seen, for persisting between runs"""
+        with self._lock:
+            return {court_id: list(seen) for court_id, seen in self._seen.items()}
+
+    def load_fingerprints(self, fingerprints: Optional[Dict[str, List[str]]]):
+        """Restore fingerprints() from a previous run, so unchanged courts aren't reported again"""
+        with self._lock:
+            for court_id, (fingerprint, court_name) in (fingerprints or {}).items():
+                self._seen[court_id] = (fingerprint, court_name)
+
+
+# Shared by every parse_location_data call that doesn't pass its own cache
+COURT_CONFIGS = CourtConfigCache()
+
+
+def fetch_location_data(location_id: str, session=None) -> Optional[Dict]:
     """
     Fetch all courts and availability for a location from rec.us API
 
@@ -50,38 +283,41 @@ def fetch_location_data(location_id: str) -> Optional[Dict]:
 
     Args:
         location_id: UUID of the location
+        session: Optional requests.Session or transport.Transport to reuse across calls;
+            defaults to a Transport configured from REC_TRANSPORT (live, record or replay)
 
     Returns:
         Dict with location data or None if request fails
     """
-    api_url = f"https://api.rec.us/v1/locations/{location_id}"
+    import requests
+
+    api_url = f"{API_BASE}/locations/{location_id}"
 
     params = {
         "publishedSites": "true"
     }
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "application/json",
-        "Origin": "https://www.rec.us",
-        "Referer": "https://www.rec.us/",
-    }
-
     try:
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
+        http = session or default_transport()
+        response = http.get(api_url, params=params, headers=API_HEADERS, timeout=10)
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, CassetteMissError) as e:
         print(f"Error fetching location {location_id}: {e}")
         return None
 
 
-def parse_location_data(location_data: Dict) -> Tuple[Optional[Dict], List[Dict]]:
+def parse_location_data(location_data: Dict, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        court_configs: Optional[CourtConfigCache] = None) -> Tuple[Optional[Dict], List[Dict]]:
     """
     Parse location and court data from API response
 
     Args:
         location_data: Raw API response from rec.us
+        start_date: Skip slots before this "YYYY-MM-DD" (inclusive bound)
+        end_date: Skip slots after this "YYYY-MM-DD" (inclusive bound)
+        court_configs: Compiled-config cache to use (default: COURT_CONFIGS)
 
     Returns:
         Tuple of (location_info, list_of_availability_slots)
@@ -107,143 +343,91 @@ def parse_location_data(location_data: Dict) -> Tuple[Optional[Dict], List[Dict]
 
     # Extract all available slots from all courts
     all_slots = []
+    intern = sys.intern if INTERN_SLOT_STRINGS else str
     for court in courts:
         court_id = court["id"]
         court_number = court.get("courtNumber", "Unknown Court")
         available_slots = court.get("availableSlots", [])
-
-        # Get pricing info
-        config = court.get("config", {})
-        pricing = config.get("pricing", {}).get("default", {})
-        price_cents = pricing.get("cents", 0)
-        price_type = pricing.get("type", "perHour")
-
-        # Determine court type from sportId
-        # Tennis: 'bd745b6e-1dd6-43e2-a69f-06f094808a96'
-        # Pickleball: 'aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa'
-        sports = court.get("sports", [])
-        court_type = "tennis"  # default
-        if sports:
-            sport_id = sports[0].get("sportId", "")
-            if sport_id == "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa":
-                court_type = "pickleball"
-            elif sport_id == "bd745b6e-1dd6-43e2-a69f-06f094808a96":
-                court_type = "tennis"
-
-        # Extract fixed slot configurations by day of week (to match real website behavior)
-        # The real website only shows slots where the entire duration is available
-        # Format: {day_of_week: list of (start_time, end_time, duration_minutes)}
-        # day_of_week: 0=Monday, 1=Tuesday, ..., 6=Sunday (Python weekday format)
-        fixed_slots_by_day = {}
-        booking_policies = config.get("bookingPolicies", [])
-        for policy in booking_policies:
-            if policy.get("type") == "fixed-slots":
-                slots_config = policy.get("slots", [])
-                for slot_config in slots_config:
-                    day_of_week = slot_config.get("dayOfWeek")  # API uses 1=Monday, 2=Tuesday, etc.
-                    start_time = slot_config.get("startTimeLocal", "")
-                    end_time = slot_config.get("endTimeLocal", "")
-                    if start_time and end_time and day_of_week is not None:
-                        # Convert API dayOfWeek (1=Monday) to Python weekday (0=Monday)
-                        python_weekday = day_of_week - 1
-                        if python_weekday not in fixed_slots_by_day:
-                            fixed_slots_by_day[python_weekday] = []
-                        fixed_slots_by_day[python_weekday].append((start_time, end_time))
-
-        # Create a set of all available slot datetimes for quick lookup
-        # Format: "YYYY-MM-DD HH:MM:SS"
-        available_slot_datetimes = set(available_slots)
-
-        # Parse each available slot, but only include those where the entire fixed slot duration is available
-        # If no fixed slots are configured, include all available slots
+        if start_date or end_date:
+            # Truncate to the requested horizon before any parsing; slot strings
+            # start with "YYYY-MM-DD", so a prefix comparison is enough
+            available_slots = [
+                slot_time for slot_time in available_slots
+                if (not start_date or slot_time[:10] >= start_date)
+                and (not end_date or slot_time[:10] <= end_date)
+            ]
+
+        # Price, sport and slot rules only change when the court's config does
+        compiled = (court_configs or COURT_CONFIGS).get(court, location["id"])
+        price_cents = compiled["price_cents"]
+        price_type = compiled["price_type"]
+        court_type = compiled["court_type"]
+        fixed_slots_by_day = compiled["fixed_slots_by_day"]
+        max_duration_minutes = compiled["max_duration_minutes"]
+
+        # Parse each available slot once, then merge adjacent 30-minute slots into
+        # maximal free runs per date so any "is X minutes free from T" check is a bisect
+        parsed_slots = []
         for slot_time in available_slots:
             # slot_time format: "2025-11-11 13:30:00"
             try:
-                dt = datetime.strptime(slot_time, "%Y-%m-%d %H:%M:%S")
-                slot_time_only = dt.strftime("%H:%M:%S")
-                slot_date = dt.strftime("%Y-%m-%d")
-                slot_weekday = dt.weekday()  # 0=Monday, 1=Tuesday, ..., 6=Sunday
-                
-                # Filter: only include slots that match fixed slot start times AND have full duration available
-                duration_minutes = None
-                if fixed_slots_by_day:
-                    day_slots = fixed_slots_by_day.get(slot_weekday, [])
-                    # Check if this time is a start time of a fixed slot
-                    is_valid_start = False
-                    for start_time, end_time in day_slots:
-                        if slot_time_only == start_time:
-                            # Verify that all 30-minute increments within this slot are available for this specific date
-                            # Parse start and end times
-                            start_dt = datetime.strptime(start_time, "%H:%M:%S")
-                            end_dt = datetime.strptime(end_time, "%H:%M:%S")
-                            
-                            # Calculate duration in minutes
-                            duration_minutes = int((end_dt - start_dt).total_seconds() / 60)
-                            
-                            # Check every 30 minutes from start to end (exclusive of end) for this date
-                            current_time = start_dt.time()
-                            end_time_obj = end_dt.time()
-                            all_available = True
-                            
-                            while current_time < end_time_obj:
-                                # Create datetime for this specific date and time
-                                check_datetime = datetime.combine(dt.date(), current_time)
-                                check_datetime_str = check_datetime.strftime("%Y-%m-%d %H:%M:%S")
-                                
-                                if check_datetime_str not in available_slot_datetimes:
-                                    all_available = False
-                                    break
-                                
-                                # Move to next 30-minute increment
-                                current_dt = datetime.combine(dt.date(), current_time)
-                                current_dt += timedelta(minutes=30)
-                                current_time = current_dt.time()
-                            
-                            if all_available:
-                                is_valid_start = True
-                            break
-                    
-                    if not is_valid_start:
-                        continue
-                else:
-                    # If no fixed slots configured, try to determine duration from maxReservationTime or default to 30
-                    max_reservation_time = court.get("maxReservationTime", "00:30:00")
-                    try:
-                        # Parse time like "01:30:00" and calculate minutes
-                        time_parts = max_reservation_time.split(":")
-                        if len(time_parts) >= 2:
-                            hours = int(time_parts[0])
-                            minutes = int(time_parts[1])
-                            duration_minutes = hours * 60 + minutes
-                        else:
-                            duration_minutes = 30
-                    except (ValueError, TypeError, IndexError):
-                        duration_minutes = 30  # Default to 30 minutes if we can't determine
-
-                all_slots.append({
-                    "location_id": location["id"],
-                    "location_name": location["name"],
-                    "court_id": court_id,
-                    "court_name": court_number,
-                    "slot_datetime": slot_time,
-                    "date": dt.strftime("%Y-%m-%d"),
-                    "time": dt.strftime("%H:%M:%S"),
-                    "price_cents": price_cents,
-                    "price_type": price_type,
-                    "court_type": court_type,
-                    "duration_minutes": duration_minutes,
-                    "is_available": True,
-                })
+                parsed_slots.append((slot_time, datetime.strptime(slot_time, "%Y-%m-%d %H:%M:%S")))
             except ValueError as e:
                 print(f"Error parsing slot time {slot_time}: {e}")
-                continue
+        free_runs = build_free_runs(dt for _, dt in parsed_slots)
+
+        # Include only slots where the entire fixed slot duration is available
+        # If no fixed slots are configured, include all available slots
+        for slot_time, dt in parsed_slots:
+            slot_time_only = intern(dt.strftime("%H:%M:%S"))
+            slot_date = intern(dt.strftime("%Y-%m-%d"))
+            slot_weekday = dt.weekday()  # 0=Monday, 1=Tuesday, ..., 6=Sunday
+            slot_minute = dt.hour * 60 + dt.minute
+            date_runs = free_runs.get(slot_date, [])
+
+            # Filter: only include slots that match fixed slot start times AND have full duration available
+            if fixed_slots_by_day:
+                # Check if this time is a start time of a fixed slot
+                duration_minutes = fixed_slots_by_day.get(slot_weekday, {}).get(slot_time_only)
+                # Every 30-minute increment of the fixed slot must be free on this date
+                if duration_minutes is None or free_minutes_from(date_runs, slot_minute) < duration_minutes:
+                    continue
+            else:
+                duration_minutes = min(max_duration_minutes, free_minutes_from(date_runs, slot_minute))
+
+            all_slots.append({
+                "location_id": location["id"],
+                "location_name": location["name"],
+                "court_id": court_id,
+                "court_name": court_number,
+                "slot_datetime": slot_time,
+                "date": slot_date,
+                "time": slot_time_only,
+                "price_cents": price_cents,
+                "price_type": price_type,
+                "court_type": court_type,
+                "duration_minutes": duration_minutes,
+                "is_available": True,
+            })
 
     return location_info, all_slots
 
 
-def scrape_all_locations() -> Tuple[List[Dict], List[Dict]]:
+def scrape_all_locations(session=None, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None, profiler=None,
+                         locations: Optional[List[Dict]] = None) -> Tuple[List[Dict], List[Dict]]:
     """
-    Scrape all 27 SF RecPark court locations
+    Scrape every location in LOCATIONS (the catalog, or the 27 SF RecPark locations)
+
+    Args:
+        session: Optional requests.Session or transport.Transport; long-running callers
+            pass one to keep connections warm
+        start_date: Only parse slots on or after this "YYYY-MM-DD"
+        end_date: Only parse slots on or before this "YYYY-MM-DD"
+        profiler: Optional profiling.ScrapeProfiler; records memory after each stage.
+            Each raw API response is released as soon as it is parsed, so at
+            most one location's payload is alive at a time
+        locations: Subset of LOCATIONS to scrape, e.g. what a RequestBudget selected
 
     Returns:
         Tuple of (locations, availability_slots)
@@ -252,18 +436,26 @@ def scrape_all_locations() -> Tuple[List[Dict], List[Dict]]:
     """
     all_locations = []
     all_slots = []
+    if locations is None:
+        locations = LOCATIONS
 
-    print(f"Starting scrape of {len(LOCATIONS)} locations at {datetime.now()}")
+    print(f"Starting scrape of {len(locations)} locations at {datetime.now()}")
 
-    for location in LOCATIONS:
+    for location in locations:
         print(f"  Scraping {location['name']}...", end=" ")
 
         # Fetch location data
-        location_data = fetch_location_data(location["location_id"])
+        location_data = fetch_location_data(location["location_id"], session)
+        if profiler:
+            profiler.checkpoint("fetch")
 
         if location_data:
             # Parse location and slots
-            location_info, slots = parse_location_data(location_data)
+            location_info, slots = parse_location_data(location_data, start_date, end_date)
+            # Release the raw payload before the next fetch builds its own
+            del location_data
+            if profiler:
+                profiler.checkpoint("parse")
 
             if location_info:
                 all_locations.append(location_info)
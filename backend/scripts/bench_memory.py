@@ -0,0 +1,138 @@
+"""
+Memory budget check for a full scrape at synthetic scale
+Feeds generated rec.us-shaped payloads through scrape_all_locations with a
+ScrapeProfiler attached and fails if traced peak memory exceeds the budget, or
+if the slot rows it returns retain more than --bytes-per-slot each (the rows,
+not the raw payloads, set the peak).
+
+A control run that gives every row its own date/time strings (as the parser
+did before interning them) must fail the per-slot check, so the check is
+known to tell the two apart.
+
+Run from backend/: python scripts/bench_memory.py [--locations 40] [--budget-mb 64]
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper  # noqa: E402
+from profiling import ScrapeProfiler  # noqa: E402
+
+
+def synthetic_payload(location_id: str, courts: int, days: int, slots_per_day: int) -> dict:
+    """
+    Build a rec.us-shaped location response
+
+    Each court gets slots_per_day consecutive 30-minute slots from 07:00 on
+    each of the next `days` days, plus padding fields the parser ignores.
+    """
+    start = date.today()
+    court_list = []
+    for c in range(courts):
+        available = []
+        for d in range(days):
+            day = (start + timedelta(days=d)).isoformat()
+            for s in range(slots_per_day):
+                minutes = 7 * 60 + s * 30
+                available.append(f"{day} {minutes // 60:02d}:{minutes % 60:02d}:00")
+        court_list.append({
+            "id": f"{location_id}-court-{c}",
+            "courtNumber": f"Court {c + 1}",
+            "maxReservationTime": "01:30:00",
+            "availableSlots": available,
+            "sports": [{"sportId": "bd745b6e-1dd6-43e2-a69f-06f094808a96"}],
+            "config": {"pricing": {"default": {"cents": 500, "type": "perHour"}}},
+            # Unused fields that are still part of the raw payload held in memory
+            "description": "x" * 2000,
+        })
+    return {
+        "location": {
+            "id": location_id,
+            "name": f"Synthetic {location_id}",
+            "lat": "37.75",
+            "lng": "-122.45",
+            "courts": court_list,
+            "description": "y" * 5000,
+        }
+    }
+
+
+def run(locations: int, courts: int, days: int, slots_per_day: int, copy_strings: bool = False):
+    """
+    Scrape synthetic locations under a profiler
+
+    Args:
+        copy_strings: Control mode: turn off scraper.INTERN_SLOT_STRINGS so
+            every row holds its own date and time strings
+
+    Returns:
+        Tuple of (profiler, slot count, bytes still traced when the scrape returned)
+    """
+    fake_locations = [
+        {"name": f"Synthetic {i}", "slug": f"synthetic{i}", "location_id": f"loc-{i}"} for i in range(locations)
+    ]
+    originals = scraper.fetch_location_data, scraper.LOCATIONS, scraper.INTERN_SLOT_STRINGS
+    scraper.fetch_location_data = lambda location_id, session=None: synthetic_payload(
+        location_id, courts, days, slots_per_day
+    )
+    scraper.LOCATIONS = fake_locations
+    scraper.INTERN_SLOT_STRINGS = not copy_strings
+    try:
+        with ScrapeProfiler(top_allocations=3) as profiler:
+            _, slots = scraper.scrape_all_locations(profiler=profiler)
+            slot_count = len(slots)
+    finally:
+        scraper.fetch_location_data, scraper.LOCATIONS, scraper.INTERN_SLOT_STRINGS = originals
+    return profiler, slot_count, profiler.checkpoints[-1]["current_bytes"]
+
+
+def check(profiler, slot_count: int, retained: int, args) -> list:
+    """Budget violations for one run"""
+    peak_mb = profiler.peak_bytes / (1024 * 1024)
+    per_slot = retained / max(slot_count, 1)
+    print(f"{slot_count:,} slots: traced peak {peak_mb:.1f} MB, {per_slot:.0f} B retained per slot")
+    failures = []
+    if peak_mb > args.budget_mb:
+        failures.append(f"traced peak {peak_mb:.1f} MB > {args.budget_mb:.0f} MB")
+    if per_slot > args.bytes_per_slot:
+        failures.append(f"{per_slot:.0f} B retained per slot > {args.bytes_per_slot} B")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check scrape peak memory against a budget")
+    parser.add_argument("--locations", type=int, default=40)
+    parser.add_argument("--courts", type=int, default=6)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--slots-per-day", type=int, default=28)
+    # ~49 MB / ~550 B per slot at the default shape; rows with their own
+    # date/time strings come to ~660 B
+    parser.add_argument("--budget-mb", type=float, default=64)
+    parser.add_argument("--bytes-per-slot", type=int, default=600)
+    args = parser.parse_args()
+    shape = (args.locations, args.courts, args.days, args.slots_per_day)
+
+    profiler, slot_count, retained = run(*shape)
+    profiler.report()
+    print()
+    failures = check(profiler, slot_count, retained, args)
+
+    print("\nControl (a copy of the date and time strings in every row):")
+    control = check(*run(*shape, copy_strings=True), args)
+    if not control:
+        failures.append("control run passed; the per-slot check can't tell shared and copied strings apart")
+
+    if failures:
+        print("\n❌ Memory check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ Within memory budget (control failed as expected: {'; '.join(control)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Daemon resilience check: subscriptions that fail to load
+Runs ScrapeDaemon cycles against a fake store whose load_subscriptions raises
+from cycle 2 on (as when slot_subscriptions doesn't exist) and fails unless
+every cycle still scrapes and stores, with the request budget and change
+events both enabled
+
+Run from backend/: python scripts/check_daemon_subscriptions.py
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import daemon  # noqa: E402
+from change_events import MemorySink  # noqa: E402
+from rate_limit import RateLimiter, RequestBudget  # noqa: E402
+
+CYCLES = 4
+
+
+class FakeStore:
+    """Stand-in for SupabaseStore that records writes"""
+
+    def __init__(self):
+        self.daemon = None
+        self.stored = 0
+
+    def acquire(self, name, owner, ttl):
+        return True
+
+    def release(self, name, owner):
+        pass
+
+    def store_locations(self, locations):
+        pass
+
+    def store_courts(self, court_configs):
+        court_configs.take_changes()
+
+    def replace_availability(self, slots):
+        self.stored += 1
+        return len(slots)
+
+    def load_subscriptions(self):
+        if self.daemon.cycles >= 1:
+            raise RuntimeError('relation "public.slot_subscriptions" does not exist')
+        return []
+
+
+def fake_scrape(session=None, start_date=None, end_date=None, profiler=None, locations=None):
+    locations = locations or daemon.LOCATIONS
+    today = date.today().isoformat()
+    slots = [{
+        "location_id": location["location_id"], "court_id": f"{location['location_id']}-1",
+        "slot_datetime": f"{today} 23:30:00", "date": today, "time": "23:30:00",
+        "court_type": "tennis", "duration_minutes": 30,
+    } for location in locations]
+    return [{"id": location["location_id"], "name": location["name"]} for location in locations], slots
+
+
+def main():
+    daemon.scrape_all_locations = fake_scrape
+    store = FakeStore()
+    scrape_daemon = daemon.ScrapeDaemon(interval_seconds=60, store=store, sink=MemorySink(),
+                                        budget=RequestBudget())
+    store.daemon = scrape_daemon
+    # The budget is only consulted with a limiter (replay mode has none)
+    scrape_daemon.session.limiter = RateLimiter()
+
+    failures = []
+    for _ in range(CYCLES):
+        try:
+            summary = scrape_daemon.run_cycle()
+        except Exception as e:
+            failures.append(f"cycle {scrape_daemon.cycles + 1} raised {e!r}")
+            break
+        if not summary.get("slots_processed"):
+            failures.append(f"cycle {summary['cycle']} processed no slots")
+    scrape_daemon.session.close()
+
+    if store.stored != CYCLES:
+        failures.append(f"stored {store.stored}/{CYCLES} cycles")
+    if failures:
+        print("\n❌ Daemon check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ {CYCLES} cycles scraped and stored with subscriptions failing from cycle 2")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Import-time budget check for backend modules
+Runs `python -X importtime` on each module in a fresh interpreter and fails if
+a module is over its budget or pulls in a heavy dependency at import
+
+Run from backend/: python scripts/check_import_time.py
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budget per module, in milliseconds
+BUDGETS_MS = {
+    "scraper": 50,
+    "availability_bitmap": 30,
+    "slot_search": 50,
+    "change_events": 50,
+    "storage": 50,
+    "horizon": 30,
+    "daemon": 50,
+    "cli": 50,
+    "populate_database": 30,
+    "profiling": 30,
+    "transport": 30,
+    "catalog": 30,
+    "rate_limit": 30,
+    "snapshots": 30,
+    "utilization": 30,
+    "coordination": 30,
+}
+
+# Third-party packages that must only ever be imported lazily
+HEAVY_MODULES = {"requests", "supabase", "modal", "httpx", "dotenv", "pyarrow"}
+
+
+def measure(module: str):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        Tuple of (cumulative_ms, set of top-level package names imported)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        # Format: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    return (cumulative_us or 0) / 1000, imported
+
+
+def main():
+    failures = []
+    print(f"  {'module':<20} {'ms':>8} {'budget':>8}")
+    for module, budget_ms in BUDGETS_MS.items():
+        elapsed_ms, imported = measure(module)
+        heavy = sorted(imported & HEAVY_MODULES)
+        status = "✓" if elapsed_ms <= budget_ms and not heavy else "✗"
+        print(f"{status} {module:<20} {elapsed_ms:>8.1f} {budget_ms:>8}")
+        if elapsed_ms > budget_ms:
+            failures.append(f"{module} took {elapsed_ms:.1f}ms (budget {budget_ms}ms)")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)} at module load")
+
+    if failures:
+        print("\n❌ Import budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ All modules within import budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the get_available_courts RPC against its Python reference implementation
+Pulls the raw availability rows for a date, runs map_availability.get_available_courts
+over them and checks the RPC returns the same grouped, deduped, sorted slots.
+Locations are compared as a set: the RPC orders them by name in the database
+collation, which Python's string order doesn't reproduce
+
+Run from backend/: python scripts/check_rpc_parity.py [YYYY-MM-DD] [tennis|pickleball]
+"""
+
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from map_availability import get_available_courts  # noqa: E402
+
+# PostgREST caps responses (supabase/config.toml max_rows), so raw rows are paged
+PAGE_SIZE = 1000
+
+
+def fetch_rows(client, target_date: str):
+    rows = []
+    while True:
+        page = (
+            client.table("availability")
+            .select("*")
+            .eq("date", target_date)
+            .eq("is_available", True)
+            .order("id")
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)
+            .execute()
+            .data
+        )
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def main():
+    from dotenv import load_dotenv
+    from storage import SupabaseStore
+
+    load_dotenv()
+    target_date = sys.argv[1] if len(sys.argv) > 1 else date.today().isoformat()
+    sport = sys.argv[2] if len(sys.argv) > 2 else None
+    client = SupabaseStore().client
+
+    locations = client.table("locations").select("*").execute().data
+    rows = fetch_rows(client, target_date)
+    # Postgres returns TIME as "HH:MM:SS" in both paths; nothing to normalize
+    expected = get_available_courts(locations, rows, target_date, sport)
+    actual = client.rpc("get_available_courts", {"p_date": target_date, "p_sport": sport}).execute().data
+
+    expected_slots = {row["id"]: row["available_slots"] for row in expected}
+    actual_slots = {row["id"]: row["available_slots"] for row in actual}
+
+    print(f"Date {target_date}, sport {sport or 'both'}")
+    print(f"  Raw rows:     {len(rows):>6}  ({len(json.dumps(rows)):,} bytes)")
+    print(f"  RPC response: {sum(len(s) for s in actual_slots.values()):>6}  ({len(json.dumps(actual)):,} bytes)")
+
+    mismatches = [
+        location_id for location_id in expected_slots.keys() | actual_slots.keys()
+        if expected_slots.get(location_id) != actual_slots.get(location_id)
+    ]
+    duplicates = len(actual) - len(actual_slots)
+
+    if mismatches or duplicates:
+        print(f"\n❌ RPC differs from reference for {len(mismatches)} locations"
+              f"{f' ({duplicates} duplicate locations)' if duplicates else ''}")
+        for location_id in mismatches[:5]:
+            print(f"  {location_id}:")
+            print(f"    expected {expected_slots.get(location_id)}")
+            print(f"    actual   {actual_slots.get(location_id)}")
+        sys.exit(1)
+    print("\n✅ RPC matches reference implementation")
+
+
+if __name__ == "__main__":
+    main()
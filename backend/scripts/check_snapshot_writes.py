@@ -0,0 +1,55 @@
+"""
+Snapshot write check: same-second writes must not overwrite each other
+Writes two snapshots with the same scraped_at (and the same part) into one
+partition and fails unless both files and all rows read back
+
+Requires pyarrow. Run from backend/: python scripts/check_snapshot_writes.py
+"""
+
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from snapshots import read_snapshots, write_snapshot  # noqa: E402
+
+
+def slots(court_id: str, count: int):
+    day = date.today().isoformat()
+    return [{
+        "location_id": "loc-1", "location_name": "Synthetic", "court_id": court_id,
+        "court_name": court_id, "court_type": "tennis", "price_type": "perHour",
+        "slot_datetime": f"{day} {7 + i:02d}:00:00", "duration_minutes": 30, "price_cents": 500,
+    } for i in range(count)]
+
+
+def main():
+    failures = []
+    scraped_at = datetime.now().replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as root:
+        written = write_snapshot(slots("court-a", 3), root, scraped_at)
+        written += write_snapshot(slots("court-b", 4), root, scraped_at)
+        files = sorted(p.name for p in Path(root).rglob("*.arrow"))
+        leftovers = [p.name for p in Path(root).iterdir() if p.name.startswith(".")]
+        rows = read_snapshots(root).num_rows
+
+    print(f"Wrote {written} rows in two same-second snapshots: {len(files)} files, {rows} rows read back")
+    if len(files) != 2:
+        failures.append(f"expected 2 files, found {files}")
+    if rows != written:
+        failures.append(f"read back {rows} of {written} rows")
+    if leftovers:
+        failures.append(f"staging directories left behind: {leftovers}")
+
+    if failures:
+        print("\n❌ Snapshot write check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ Same-second snapshots are kept side by side")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 """
 Debug script to see what the API actually returns
+Honors REC_TRANSPORT=record/replay like the scraper (see transport.py)
 """
 
 import json
-from scraper import fetch_location_data, LOCATIONS
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scraper import fetch_location_data, LOCATIONS  # noqa: E402
 
 # Get Alice Marble data
 location = LOCATIONS[0]
@@ -1,15 +1,20 @@
-"""Test fetching location data for one court to debug"""
+"""
+Test fetching location data for one court to debug
+Honors REC_TRANSPORT=record/replay like the scraper (see transport.py)
+"""
 
-import requests
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transport import PAGE_BASE, PAGE_HEADERS, default_transport  # noqa: E402
 
 slug = "alicemarble"
-url = f"https://rec.us/{slug}"
-headers = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-}
+url = f"{PAGE_BASE}/{slug}"
 
 print(f"Fetching {url}...")
-response = requests.get(url, headers=headers, timeout=10)
+response = default_transport().get(url, headers=PAGE_HEADERS, timeout=10)
 print(f"Status: {response.status_code}")
 print(f"Content length: {len(response.text)}")
 
@@ -0,0 +1,418 @@
+"""
+Slot search query engine
+Answers "which court is free near me for N minutes" over scraper output
+without scanning every slot row
+"""
+
+import argparse
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+
+from availability_bitmap import (
+    SLOT_MINUTES,
+    SLOTS_PER_DAY,
+    aligned_slots,
+    free_window_starts,
+    index_to_time,
+    pack_slots,
+    slot_index,
+)
+
+
+EARTH_RADIUS_MILES = 3958.8
+
+# ~0.7 miles of latitude per cell; SF fits in a handful of cells
+GRID_CELL_DEGREES = 0.01
+
+
+def _minutes_of_day(time_str: str) -> int:
+    try:
+        parts = [int(part) for part in time_str.split(":")]
+        hours, minutes = parts[0], parts[1]
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid time {time_str!r}: expected HH:MM or HH:MM:SS") from None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time {time_str!r}: expected HH:MM or HH:MM:SS")
+    return hours * 60 + minutes
+
+
+def start_slot(time_str: str) -> int:
+    """
+    Slot index of a requested start time
+
+    Raises:
+        ValueError: If the time is malformed or not on the booking grid
+    """
+    minutes = _minutes_of_day(time_str)
+    if minutes % SLOT_MINUTES:
+        raise ValueError(f"Start time {time_str} isn't bookable: courts start on "
+                         f"{SLOT_MINUTES}-minute boundaries (e.g. 09:00 or 09:30)")
+    return minutes // SLOT_MINUTES
+
+
+def first_slot_after(time_str: str) -> int:
+    """
+    Index of the first slot starting at or after a time (rounded up to the grid;
+    SLOTS_PER_DAY if none is left that day)
+
+    Raises:
+        ValueError: If the time is malformed
+    """
+    return -(-_minutes_of_day(time_str) // SLOT_MINUTES)
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in miles"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+class LocationGrid:
+    """
+    Uniform lat/lng grid over locations
+
+    Nearest-neighbour queries walk rings of cells outward from the query point
+    and stop once the ring is further away than the best candidate or radius.
+    """
+
+    def __init__(self, locations: List[Dict], cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[Dict]] = {}
+        self.size = 0
+        for location in locations:
+            if location.get("lat") is None or location.get("lng") is None:
+                continue
+            self.cells.setdefault(self._cell(location["lat"], location["lng"]), []).append(location)
+            self.size += 1
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _ring(self, center: Tuple[int, int], radius: int):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for d in range(-radius, radius + 1):
+            yield row - radius, col + d
+            yield row + radius, col + d
+        for d in range(-radius + 1, radius):
+            yield row + d, col - radius
+            yield row + d, col + radius
+
+    def nearby(self, lat: float, lng: float, radius_miles: Optional[float] = None):
+        """
+        Yield (distance_miles, location) in increasing distance order
+
+        Args:
+            lat: Query latitude
+            lng: Query longitude
+            radius_miles: Stop once locations are further than this
+        """
+        if not self.cells:
+            return
+        center = self._cell(lat, lng)
+        # Smallest width of a cell in miles (longitude cells shrink with latitude)
+        cell_miles = self.cell_degrees * 69.0 * max(math.cos(math.radians(lat)), 0.01)
+        max_ring = max(
+            max(abs(r - center[0]), abs(c - center[1])) for r, c in self.cells
+        )
+
+        pending: List[Tuple[float, str, Dict]] = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring(center, ring):
+                for location in self.cells.get(cell, []):
+                    distance = haversine_miles(lat, lng, location["lat"], location["lng"])
+                    if radius_miles is None or distance <= radius_miles:
+                        pending.append((distance, location["id"], location))
+            # Anything within ring * cell_miles of the query has been seen by now
+            pending.sort(key=lambda item: (item[0], item[1]))
+            safe = ring * cell_miles
+            while pending and pending[0][0] <= safe:
+                distance, _, location = pending.pop(0)
+                yield distance, location
+            if radius_miles is not None and safe > radius_miles:
+                break
+        for distance, _, location in pending:
+            yield distance, location
+
+
+class SlotIndex:
+    """
+    In-memory index over one scrape
+
+    Slots are packed into a bitmap of bookable start times per (location,
+    date, court) plus the duration the scraper found bookable from each start,
+    so time and duration checks are a few integer ops per court. Fixed-slot
+    courts only get bits at their policy's start times.
+    """
+
+    def __init__(self, locations: List[Dict], slots: List[Dict]):
+        self.locations = {location["id"]: location for location in locations}
+        self.grid = LocationGrid(locations)
+        # (location_id, date) -> {court_id: court record with "bitmap" and "durations"}
+        self.courts: Dict[Tuple[str, str], Dict[str, Dict]] = {}
+        try:
+            records = pack_slots(slots)
+        except ValueError:
+            records = pack_slots(aligned_slots(slots))
+        for record in records:
+            self.courts.setdefault((record["location_id"], record["date"]), {})[record["court_id"]] = {
+                "court_id": record["court_id"],
+                "court_name": record["court_name"],
+                "court_type": record["court_type"],
+                "price_cents": record["price_cents"],
+                "bitmap": record["slot_bitmap"],
+                # start index -> bookable minutes
+                "durations": {slot_index(time): minutes for time, minutes in record["durations"].items()},
+            }
+
+    @staticmethod
+    def _bookable_starts(court: Dict, duration_minutes: int) -> int:
+        """Bitmap of starts from which the court can be booked for duration_minutes"""
+        durations = court["durations"]
+        # Rows without a duration (older scrapes) fall back to runs of free starts
+        run_starts = free_window_starts(court["bitmap"], duration_minutes)
+        bookable = 0
+        starts = court["bitmap"]
+        while starts:
+            low = starts & -starts
+            minutes = durations.get(low.bit_length() - 1)
+            if minutes is None:
+                bookable |= run_starts & low
+            elif minutes >= duration_minutes:
+                bookable |= low
+            starts ^= low
+        return bookable
+
+    def _courts_for(self, location_id: str, date: str, sport: Optional[str]):
+        for court in self.courts.get((location_id, date), {}).values():
+            if sport and court["court_type"] != sport:
+                continue
+            yield court
+
+    def _result(self, location: Dict, court: Dict, date: str, start_index: int,
+                duration_minutes: int, distance: Optional[float] = None) -> Dict:
+        result = {
+            "location_id": location["id"],
+            "location_name": location["name"],
+            "court_id": court["court_id"],
+            "court_name": court["court_name"],
+            "court_type": court["court_type"],
+            "date": date,
+            "time": index_to_time(start_index),
+            "duration_minutes": duration_minutes,
+        }
+        if distance is not None:
+            result["distance_miles"] = round(distance, 2)
+        return result
+
+    def available_courts(self, location_id: str, date: str, time: str, duration_minutes: int = 30,
+                         sport: Optional[str] = None) -> List[Dict]:
+        """
+        Courts at a location free for the whole window starting at time
+
+        Args:
+            location_id: Location UUID
+            date: "YYYY-MM-DD"
+            time: Window start "HH:MM:SS", on the 30-minute grid
+            duration_minutes: Window length
+            sport: Optional court_type filter ("tennis" or "pickleball")
+
+        Returns:
+            List of result dicts, one per free court
+
+        Raises:
+            ValueError: If time is malformed or off the grid
+        """
+        location = self.locations.get(location_id)
+        if location is None:
+            return []
+        start = start_slot(time)
+        return [
+            self._result(location, court, date, start, duration_minutes)
+            for court in self._courts_for(location_id, date, sport)
+            if self._bookable_starts(court, duration_minutes) >> start & 1
+        ]
+
+    def nearest_available(self, lat: float, lng: float, date: str, time: str,
+                          duration_minutes: int = 30, radius_miles: Optional[float] = None,
+                          sport: Optional[str] = None, limit: int = 5) -> List[Dict]:
+        """
+        Closest locations with a court free for the whole window
+
+        Args:
+            lat: Query latitude
+            lng: Query longitude
+            date: "YYYY-MM-DD"
+            time: Window start "HH:MM:SS", on the 30-minute grid
+            duration_minutes: Window length
+            radius_miles: Only consider locations within this distance
+            sport: Optional court_type filter
+            limit: Maximum number of results
+
+        Returns:
+            Result dicts sorted by distance, at most one per location
+        """
+        results = []
+        for distance, location in self.grid.nearby(lat, lng, radius_miles):
+            courts = self.available_courts(location["id"], date, time, duration_minutes, sport)
+            if courts:
+                courts[0]["distance_miles"] = round(distance, 2)
+                results.append(courts[0])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def earliest_available(self, date: str, duration_minutes: int = 30, after: str = "00:00:00",
+                           lat: Optional[float] = None, lng: Optional[float] = None,
+                           radius_miles: Optional[float] = None, sport: Optional[str] = None,
+                           limit: int = 5) -> List[Dict]:
+        """
+        Earliest windows of the requested length at or after a time
+
+        Args:
+            date: "YYYY-MM-DD"
+            duration_minutes: Window length
+            after: Earliest acceptable start "HH:MM:SS" (rounded up to the next slot)
+            lat: Optional query latitude (requires lng)
+            lng: Optional query longitude (requires lat)
+            radius_miles: Only consider locations within this distance of lat/lng
+            sport: Optional court_type filter
+            limit: Maximum number of results
+
+        Returns:
+            Result dicts sorted by start time then distance, at most one per location
+        """
+        if lat is not None and lng is not None:
+            candidates = list(self.grid.nearby(lat, lng, radius_miles))
+        else:
+            candidates = [(None, location) for location in self.locations.values()]
+
+        first = first_slot_after(after)
+        if first >= SLOTS_PER_DAY:
+            return []
+        after_mask = ~((1 << first) - 1)
+        results = []
+        for distance, location in candidates:
+            best = None
+            for court in self._courts_for(location["id"], date, sport):
+                starts = self._bookable_starts(court, duration_minutes) & after_mask
+                if not starts:
+                    continue
+                # Lowest set bit is the earliest start
+                start = (starts & -starts).bit_length() - 1
+                if best is None or start < best[0]:
+                    best = (start, court)
+            if best is not None:
+                results.append(self._result(location, best[1], date, best[0], duration_minutes, distance))
+
+        results.sort(key=lambda r: (r["time"], r.get("distance_miles") or 0.0, r["location_name"]))
+        return results[:limit]
+
+    def contiguous_windows(self, location_id: str, date: str, duration_minutes: int,
+                           sport: Optional[str] = None) -> List[Dict]:
+        """
+        Every start time at a location with a court free for duration_minutes
+
+        Args:
+            location_id: Location UUID
+            date: "YYYY-MM-DD"
+            duration_minutes: Window length
+            sport: Optional court_type filter
+
+        Returns:
+            Result dicts sorted by start time, one per (court, start)
+        """
+        location = self.locations.get(location_id)
+        if location is None:
+            return []
+        results = []
+        for court in self._courts_for(location_id, date, sport):
+            starts = self._bookable_starts(court, duration_minutes)
+            while starts:
+                start = (starts & -starts).bit_length() - 1
+                results.append(self._result(location, court, date, start, duration_minutes))
+                starts &= starts - 1
+        results.sort(key=lambda r: (r["time"], r["court_name"] or ""))
+        return results
+
+
+def load_index(data_path: Optional[str] = None) -> SlotIndex:
+    """
+    Build a SlotIndex from a saved scrape or a live one
+
+    Args:
+        data_path: JSON file written by test_scraper.save_full_data; scrapes live when None
+
+    Returns:
+        SlotIndex over the scrape
+    """
+    if data_path:
+        with open(data_path) as f:
+            data = json.load(f)
+        return SlotIndex(data["locations"], data["availability"])
+
+    from scraper import scrape_all_locations
+    locations, slots = scrape_all_locations()
+    return SlotIndex(locations, slots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search scraped court availability")
+    parser.add_argument("--data", help="Scrape JSON (from test_scraper.py); scrapes live if omitted")
+    parser.add_argument("--sport", choices=["tennis", "pickleball"])
+    parser.add_argument("--limit", type=int, default=5)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    nearest = subparsers.add_parser("nearest", help="Closest court free at a time")
+    nearest.add_argument("--lat", type=float, required=True)
+    nearest.add_argument("--lng", type=float, required=True)
+    nearest.add_argument("--date", required=True)
+    nearest.add_argument("--time", required=True)
+    nearest.add_argument("--duration", type=int, default=30)
+    nearest.add_argument("--radius", type=float, help="Radius in miles")
+
+    earliest = subparsers.add_parser("earliest", help="Earliest free window on a date")
+    earliest.add_argument("--date", required=True)
+    earliest.add_argument("--after", default="00:00:00")
+    earliest.add_argument("--duration", type=int, default=30)
+    earliest.add_argument("--lat", type=float)
+    earliest.add_argument("--lng", type=float)
+    earliest.add_argument("--radius", type=float, help="Radius in miles")
+
+    windows = subparsers.add_parser("windows", help="All windows of a length at a location")
+    windows.add_argument("--location-id", required=True)
+    windows.add_argument("--date", required=True)
+    windows.add_argument("--duration", type=int, default=60)
+
+    args = parser.parse_args()
+    # Check search times before a possibly live scrape
+    try:
+        if args.command == "nearest":
+            start_slot(args.time)
+        elif args.command == "earliest":
+            first_slot_after(args.after)
+    except ValueError as e:
+        parser.error(str(e))
+    index = load_index(args.data)
+
+    if args.command == "nearest":
+        results = index.nearest_available(args.lat, args.lng, args.date, args.time, args.duration,
+                                          args.radius, args.sport, args.limit)
+    elif args.command == "earliest":
+        results = index.earliest_available(args.date, args.duration, args.after, args.lat, args.lng,
+                                           args.radius, args.sport, args.limit)
+    else:
+        results = index.contiguous_windows(args.location_id, args.date, args.duration,
+                                           args.sport)[:args.limit]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
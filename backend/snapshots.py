@@ -0,0 +1,211 @@
+"""
+Columnar scrape snapshots
+Each scrape is written as Arrow IPC (default, memory-mappable) or Parquet,
+partitioned by slot date (<root>/date=YYYY-MM-DD/<scraped_at>-<token>-0-0.arrow), with
+dictionary-encoded categorical columns and typed timestamps. Months of
+snapshots can then be scanned as one dataset without parsing JSON.
+
+Requires pyarrow (optional; pip install pyarrow). It is only imported when a
+snapshot is written or read.
+"""
+
+import os
+import shutil
+import uuid
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+# Low-cardinality string columns stored as dictionary<int32, string>
+CATEGORICAL_COLUMNS = ["location_id", "location_name", "court_id", "court_name", "court_type", "price_type"]
+
+FORMATS = {"arrow": ("ipc", "arrow"), "parquet": ("parquet", "parquet")}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        raise ImportError("Columnar snapshots need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def snapshot_schema():
+    """
+    Arrow schema of a snapshot row
+
+    slot_datetime is the court's local wall-clock time as rec.us reports it
+    (no zone); scraped_at is UTC.
+    """
+    pa = _pyarrow()
+    categorical = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("scraped_at", pa.timestamp("us", tz="UTC")),
+        ("location_id", categorical),
+        ("location_name", categorical),
+        ("court_id", categorical),
+        ("court_name", categorical),
+        ("court_type", categorical),
+        ("price_type", categorical),
+        ("slot_datetime", pa.timestamp("s")),
+        ("date", pa.date32()),
+        ("time", pa.time32("s")),
+        ("duration_minutes", pa.int16()),
+        ("price_cents", pa.int32()),
+        ("is_available", pa.bool_()),
+    ])
+
+
+def slots_to_table(slots: List[Dict], scraped_at: Optional[datetime] = None):
+    """
+    Convert scraper slot dicts to an Arrow table with snapshot_schema()
+
+    Args:
+        slots: Slot dicts from scraper.scrape_all_locations
+        scraped_at: Scrape time (default: now); naive datetimes are taken as local time
+    """
+    pa = _pyarrow()
+    scraped_at = (scraped_at or datetime.now()).astimezone(timezone.utc)
+    schema = snapshot_schema()
+
+    # rec.us strings are ISO "YYYY-MM-DD HH:MM:SS"; casting them in Arrow is
+    # much faster than strptime per slot
+    slot_datetime = pa.array([slot["slot_datetime"] for slot in slots], pa.string()).cast(pa.timestamp("s"))
+    computed = {
+        "slot_datetime": slot_datetime,
+        "date": slot_datetime.cast(pa.date32()),
+        "time": slot_datetime.cast(pa.time32("s")),
+        "is_available": pa.array([slot.get("is_available", True) for slot in slots], pa.bool_()),
+    }
+
+    arrays = [pa.array([scraped_at] * len(slots), schema.field("scraped_at").type)]
+    for name in schema.names[1:]:
+        field_type = schema.field(name).type
+        if name in computed:
+            arrays.append(computed[name])
+        elif pa.types.is_dictionary(field_type):
+            arrays.append(pa.array([slot.get(name) for slot in slots], pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array([slot.get(name) for slot in slots], field_type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _partitioning():
+    pa = _pyarrow()
+    return pa.dataset.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+def write_snapshot(slots: List[Dict], root: str, scraped_at: Optional[datetime] = None,
+                   fmt: str = "arrow", part: str = "0") -> int:
+    """
+    Append one scrape to a snapshot dataset
+
+    Args:
+        slots: Slot dicts from the scraper
+        root: Dataset directory
+        scraped_at: Scrape time; also names the files (plus a random token, so
+            snapshots never overwrite each other)
+        fmt: "arrow" (uncompressed IPC, zero-copy memory-mapped reads) or "parquet" (smaller)
+        part: Distinguishes several writes that share a scraped_at
+
+    Returns:
+        Number of rows written
+    """
+    pa = _pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if not slots:
+        return 0
+    scraped_at = scraped_at or datetime.now()
+    table = slots_to_table(slots, scraped_at)
+    dataset_format, extension = FORMATS[fmt]
+    # Microseconds plus a random token, so two writes in the same second never share a name
+    stamp = scraped_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    token = uuid.uuid4().hex[:12]
+
+    # Write into a fresh staging directory (dataset discovery skips "."-prefixed
+    # paths), then link each file into place: os.link fails instead of
+    # replacing an existing file, so no snapshot is ever overwritten
+    staging = os.path.join(root, f".staging-{token}")
+    pa.dataset.write_dataset(
+        table,
+        staging,
+        format=dataset_format,
+        partitioning=_partitioning(),
+        basename_template=f"{stamp}-{token}-{part}-{{i}}.{extension}",
+        existing_data_behavior="error",
+    )
+    try:
+        for directory, _, files in os.walk(staging):
+            target = os.path.join(root, os.path.relpath(directory, staging))
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                os.link(os.path.join(directory, name), os.path.join(target, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return table.num_rows
+
+
+def open_snapshots(root: str, fmt: str = "arrow"):
+    """
+    Open a snapshot dataset for scanning
+
+    Arrow IPC files are memory-mapped, so scans read straight from the page
+    cache without copying. Filters on `date` prune whole partitions.
+
+    Returns:
+        pyarrow.dataset.Dataset
+    """
+    pa = _pyarrow()
+    from pyarrow import fs
+
+    dataset_format, _ = FORMATS[fmt]
+    return pa.dataset.dataset(
+        root,
+        format=dataset_format,
+        partitioning=_partitioning(),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_snapshots(root: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   columns: Optional[List[str]] = None, fmt: str = "arrow"):
+    """
+    Load snapshot rows for a date range as an Arrow table
+
+    Args:
+        start_date: First slot date "YYYY-MM-DD" (inclusive)
+        end_date: Last slot date "YYYY-MM-DD" (inclusive)
+        columns: Only these columns
+    """
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+
+    dataset = open_snapshots(root, fmt)
+    condition = None
+    if start_date:
+        condition = pc.field("date") >= pa.scalar(date.fromisoformat(start_date))
+    if end_date:
+        upper = pc.field("date") <= pa.scalar(date.fromisoformat(end_date))
+        condition = upper if condition is None else condition & upper
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+class SnapshotSink:
+    """
+    Incremental sink interface over write_snapshot, for cli backfill
+
+    Every write() call shares the scrape time the sink was created with, so
+    one backfill run reads back as one snapshot.
+    """
+
+    def __init__(self, root: str, fmt: str = "arrow"):
+        self.root = root
+        self.fmt = fmt
+        self.scraped_at = datetime.now()
+        self._batches = 0
+
+    def write(self, locations: List[Dict], slots: List[Dict]):
+        if slots:
+            self._batches += 1
+            write_snapshot(slots, self.root, self.scraped_at, self.fmt, part=f"b{self._batches}")
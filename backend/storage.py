@@ -0,0 +1,269 @@
+"""
+Storage sinks for scraped court data
+Shared by modal_service.py, populate_database.py, the daemon and the CLI
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from availability_bitmap import aligned_slots, pack_slots
+
+
+# Supabase has a limit on batch operations, so writes are chunked
+CHUNK_SIZE = 1000
+
+# PostgREST "function not found in schema cache" and Postgres undefined_function
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+# Availability upserts match the partitioned table's unique constraint; databases
+# without the partition migration only have the original (court_id, slot_datetime) one
+AVAILABILITY_CONFLICT = "court_id,slot_datetime,date"
+LEGACY_AVAILABILITY_CONFLICT = "court_id,slot_datetime"
+
+# Postgres "no unique or exclusion constraint matching the ON CONFLICT specification"
+NO_MATCHING_CONSTRAINT_CODE = "42P10"
+
+
+def missing_function(error: Exception) -> bool:
+    """True if an RPC failed because the database doesn't define the function"""
+    code = getattr(error, "code", None)
+    if code in MISSING_FUNCTION_CODES:
+        return True
+    message = str(error)
+    return "Could not find the function" in message or ("function" in message and "does not exist" in message)
+
+
+class SupabaseStore:
+    """
+    Writes scrape results to Supabase
+
+    The client is created on first use and reused afterwards, so a long-lived
+    process keeps a single warm HTTP connection pool.
+    """
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        self.url = url or os.environ["SUPABASE_URL"]
+        self.key = key or os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+        self._client = None
+        self._availability_conflict = AVAILABILITY_CONFLICT
+
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase import create_client
+
+            self._client = create_client(self.url, self.key)
+        return self._client
+
+    def store_locations(self, locations: List[Dict]):
+        """Upsert location rows (update if exists)"""
+        if locations:
+            self.client.table("locations").upsert(locations).execute()
+            print(f"Successfully stored {len(locations)} locations")
+
+    def replace_availability(self, slots: List[Dict]) -> int:
+        """
+        Replace all availability data with the latest scrape
+
+        Strategy: Delete all old data, then insert new data. This ensures we only
+        show data from the latest scrape. Nothing is deleted when slots is empty,
+        so the database is never left empty by a failed scrape.
+
+        Args:
+            slots: Slot dicts from scraper.scrape_all_locations
+
+        Returns:
+            Number of slots inserted
+        """
+        if not slots:
+            print("⚠️  No availability data found in scrape - keeping existing data to avoid empty database")
+            return 0
+
+        print(f"Replacing all availability data with {len(slots)} slots from latest scrape...")
+
+        # Step 1: Delete all existing availability data
+        print("Deleting all existing availability data...")
+        try:
+            # TRUNCATE the partitioned table instead of scanning it with DELETE
+            self.client.rpc("truncate_availability").execute()
+            print("  ✓ Truncated availability")
+        except Exception as e:
+            print(f"  ⚠️  truncate_availability unavailable ({e}), falling back to DELETE")
+            try:
+                # Delete all records using a condition that matches everything
+                # Using gte on created_at with a very old date matches all records
+                self.client.table("availability").delete().gte("created_at", "1970-01-01").execute()
+                print("  ✓ Deleted all existing availability records")
+            except Exception as e:
+                print(f"  ⚠️  Warning: Error deleting old data (may not exist): {e}")
+
+        # Step 2: Insert all new availability data from latest scrape
+        total_inserted = 0
+        total_batches = (len(slots) + CHUNK_SIZE - 1) // CHUNK_SIZE
+        for i in range(0, len(slots), CHUNK_SIZE):
+            chunk = slots[i:i + CHUNK_SIZE]
+            try:
+                self.client.table("availability").insert(chunk).execute()
+                total_inserted += len(chunk)
+                print(f"  Inserted {len(chunk)} slots (batch {i // CHUNK_SIZE + 1}/{total_batches})")
+            except Exception as e:
+                print(f"  ❌ Error inserting batch {i // CHUNK_SIZE + 1}: {e}")
+                raise  # Re-raise to ensure we know if insertion failed
+
+        print(f"✅ Successfully replaced all availability data with {total_inserted} slots from latest scrape")
+
+        # Step 3: Write the compact one-row-per-court-per-day format alongside
+        self.replace_court_days(slots)
+        return total_inserted
+
+    def upsert_availability(self, slots: List[Dict]) -> int:
+        """
+        Upsert slots without deleting anything (used for incremental loads)
+
+        Args:
+            slots: Slot dicts from the scraper
+
+        Returns:
+            Number of slots upserted
+        """
+        total_batches = (len(slots) + CHUNK_SIZE - 1) // CHUNK_SIZE
+        for i in range(0, len(slots), CHUNK_SIZE):
+            chunk = slots[i:i + CHUNK_SIZE]
+            # Use upsert with on_conflict to handle duplicates based on unique constraint
+            # (includes date, the partition key)
+            try:
+                self.client.table("availability").upsert(chunk, on_conflict=self._availability_conflict).execute()
+            except Exception as e:
+                already_legacy = self._availability_conflict == LEGACY_AVAILABILITY_CONFLICT
+                if already_legacy or getattr(e, "code", None) != NO_MATCHING_CONSTRAINT_CODE:
+                    raise
+                print("  ⚠️  availability isn't partitioned yet, upserting on (court_id, slot_datetime)")
+                self._availability_conflict = LEGACY_AVAILABILITY_CONFLICT
+                self.client.table("availability").upsert(chunk, on_conflict=self._availability_conflict).execute()
+            print(f"  ✅ Upserted {len(chunk)} slots (batch {i // CHUNK_SIZE + 1}/{total_batches})")
+        return len(slots)
+
+    def delete_expired_availability(self):
+        """Delete rows dated before today (what dropping partitions does on a partitioned table)"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.client.table("availability").delete().lt("date", today).execute()
+
+    def replace_court_days(self, slots: List[Dict]):
+        """Rewrite the court_day_availability bitmaps from a full scrape"""
+        try:
+            try:
+                court_days = pack_slots(slots)
+            except ValueError:
+                # Off-grid times can't go in a bitmap; pack the rest
+                court_days = pack_slots(aligned_slots(slots))
+            self.client.table("court_day_availability").delete().gte("date", "1970-01-01").execute()
+            for i in range(0, len(court_days), CHUNK_SIZE):
+                self.client.table("court_day_availability").upsert(
+                    court_days[i:i + CHUNK_SIZE], on_conflict="court_id,date"
+                ).execute()
+            print(f"  ✓ Stored {len(court_days)} court-day bitmaps")
+        except Exception as e:
+            print(f"  ⚠️  Warning: Error storing court-day bitmaps: {e}")
+
+    def store_courts(self, court_configs):
+        """
+        Upsert metadata for courts whose config changed since the last call
+
+        Args:
+            court_configs: scraper.CourtConfigCache the scrape parsed with
+                (usually scraper.COURT_CONFIGS); its change records are consumed,
+                or handed back to be retried next time if the write fails
+        """
+        changes = court_configs.take_changes()
+        if not changes:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            {key: value for key, value in change.items() if key != "previous_fingerprint"} | {"updated_at": now}
+            for change in changes
+        ]
+        try:
+            for i in range(0, len(rows), CHUNK_SIZE):
+                self.client.table("courts").upsert(rows[i:i + CHUNK_SIZE]).execute()
+            print(f"  ✓ Updated {len(rows)} changed courts")
+        except Exception as e:
+            court_configs.forget(change["id"] for change in changes)
+            print(f"  ⚠️  Warning: Error storing courts: {e}")
+
+    def write(self, locations: List[Dict], slots: List[Dict]):
+        """Incremental sink interface: upsert a batch of locations and slots"""
+        if locations:
+            self.client.table("locations").upsert(locations).execute()
+        if slots:
+            self.upsert_availability(slots)
+
+    def load_subscriptions(self) -> List[Dict]:
+        """Active rows from slot_subscriptions"""
+        return self.client.table("slot_subscriptions").select("*").eq("is_active", True).execute().data
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take a row in scrape_leases (lease backend for coordination.run_lease)
+
+        Every process writing to this database shares it, wherever it runs.
+        If the database has no acquire_lease function (schema not migrated),
+        the lease is treated as held so scrapes keep working uncoordinated; any
+        other failure counts as not acquired, since the holder may be mid-write.
+        """
+        try:
+            return bool(self.client.rpc("acquire_lease", {
+                "p_name": name, "p_owner": owner, "p_ttl_seconds": int(ttl),
+            }).execute().data)
+        except Exception as e:
+            if missing_function(e):
+                print(f"  ⚠️  acquire_lease not defined ({e}), continuing without a lease")
+                return True
+            print(f"  ⚠️  Warning: Error acquiring lease {name}: {e}")
+            return False
+
+    def release(self, name: str, owner: str):
+        try:
+            self.client.rpc("release_lease", {"p_name": name, "p_owner": owner}).execute()
+        except Exception as e:
+            print(f"  ⚠️  Warning: Error releasing lease {name}: {e}")
+
+
+class JsonlSink:
+    """
+    Appends scrape batches to JSON Lines files
+
+    Locations go to <path>.locations.jsonl and slots to <path>, one record per line,
+    so large loads stream to disk without holding everything in memory.
+    position()/truncate() let cli backfill roll back writes its checkpoint
+    never recorded, so a resumed run doesn't duplicate rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.locations_path = f"{os.path.splitext(path)[0]}.locations.jsonl"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, locations: List[Dict], slots: List[Dict]):
+        """Incremental sink interface: append a batch of locations and slots"""
+        if locations:
+            with open(self.locations_path, "a") as f:
+                for location in locations:
+                    f.write(json.dumps(location) + "\n")
+        if slots:
+            with open(self.path, "a") as f:
+                for slot in slots:
+                    f.write(json.dumps(slot) + "\n")
+
+    def position(self) -> List[int]:
+        """Current sizes of the slots and locations files"""
+        return [os.path.getsize(p) if os.path.exists(p) else 0 for p in (self.path, self.locations_path)]
+
+    def truncate(self, position: List[int]):
+        """Drop anything appended after position()"""
+        for path, size in zip((self.path, self.locations_path), position):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
@@ -137,6 +137,15 @@ def save_full_data(locations, slots):
     print(f"   - {len(locations)} locations")
     print(f"   - {len(slots)} availability slots")
 
+    # Columnar copy for analysis; optional because it needs pyarrow
+    try:
+        from snapshots import write_snapshot
+
+        write_snapshot(slots, "data/snapshots")
+        print("💾 Appended columnar snapshot to data/snapshots")
+    except ImportError as e:
+        print(f"   (skipping columnar snapshot: {e})")
+
 
 def main():
     """Main test function - scrapes all locations"""
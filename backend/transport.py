@@ -0,0 +1,321 @@
+"""
+Shared HTTP transport for rec.us
+One place for the request headers, plus record/replay against a local
+cassette store so fetch and parse changes can be measured offline
+
+Modes:
+    live    Requests go to rec.us (default)
+    record  Requests go to rec.us and every response is saved to the cassette store
+    replay  Responses come from the cassette store; nothing touches the network
+
+Scripts pick the mode up from the environment:
+    REC_TRANSPORT=replay REC_REPLAY_LATENCY_MS=150 REC_REPLAY_JITTER_MS=50 python cli.py bench
+
+With REC_FETCH_CACHE_TTL set, live requests also go through a short-TTL fetch
+cache shared with other processes (see coordination.py), so concurrent
+scrapers fetch each URL once.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import urlencode
+
+if TYPE_CHECKING:
+    import requests
+
+
+API_BASE = "https://api.rec.us/v1"
+PAGE_BASE = "https://rec.us"
+
+# Headers for api.rec.us JSON endpoints
+API_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "application/json",
+    "Origin": "https://www.rec.us",
+    "Referer": "https://www.rec.us/",
+}
+
+# Headers for rec.us HTML pages
+PAGE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+}
+
+MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE_DIR = "data/cassettes"
+
+
+class CassetteMissError(LookupError):
+    """Replay was asked for a request that was never recorded"""
+
+
+def request_key(url: str, params: Optional[Dict] = None, method: str = "GET") -> str:
+    """
+    Content address of a request: sha256 of the method, URL and sorted query params
+
+    Headers are deliberately left out so a header change doesn't invalidate recordings.
+    """
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{method} {url}?{query}".encode()).hexdigest()
+
+
+class CassetteStore:
+    """
+    Gzipped, content-addressed response store on local disk
+
+    Layout:
+        requests/<request key>.json     status, content type, elapsed time and body hash
+        bodies/<aa>/<body sha256>.gz    gzipped response body, shared by identical responses
+
+    Files are written to a temp path and renamed, so concurrent recorders
+    never leave a half-written entry behind.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CASSETTE_DIR):
+        self.directory = directory
+
+    def _request_path(self, key: str) -> str:
+        return os.path.join(self.directory, "requests", f"{key}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "bodies", digest[:2], f"{digest}.gz")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, method: str, url: str, params: Optional[Dict], status_code: int, content: bytes,
+             content_type: Optional[str] = None, elapsed_ms: Optional[float] = None) -> str:
+        """
+        Store a response
+
+        Returns:
+            The request key it was stored under
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            # mtime=0 keeps the compressed bytes identical across recordings
+            self._write_atomic(body_path, gzip.compress(content, mtime=0))
+
+        key = request_key(url, params, method)
+        entry = {
+            "method": method,
+            "url": url,
+            "params": params or {},
+            "status_code": status_code,
+            "content_type": content_type,
+            "body": digest,
+            "elapsed_ms": elapsed_ms,
+            "recorded_at": datetime.now().isoformat(),
+        }
+        self._write_atomic(self._request_path(key), json.dumps(entry, indent=2).encode())
+        return key
+
+    def load(self, method: str, url: str, params: Optional[Dict] = None):
+        """
+        Look up a recorded response
+
+        Returns:
+            Tuple of (entry dict, body bytes)
+
+        Raises:
+            CassetteMissError: if the request was never recorded
+        """
+        key = request_key(url, params, method)
+        try:
+            with open(self._request_path(key)) as f:
+                entry = json.load(f)
+            with gzip.open(self._body_path(entry["body"]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recording for {method} {url} {params or ''} in {self.directory}")
+        return entry, content
+
+
+class Transport:
+    """
+    requests-compatible get() that can record to or replay from a CassetteStore
+
+    Anything that takes a requests.Session for fetching (scraper.fetch_location_data,
+    scrape_all_locations, the daemon, cli backfill) accepts a Transport too.
+
+    Args:
+        mode: "live", "record" or "replay"
+        cassette_dir: Cassette store directory
+        session: requests.Session used for live and record requests (default: module-level requests)
+        latency_ms: Simulated latency per replayed response; None replays the recorded latency
+        jitter_ms: Uniform +/- jitter added to the replay latency
+        seed: Seed for the jitter, so replays with the same seed sleep identically
+        limiter: Optional rate_limit.RateLimiter; paces requests and retries throttled ones
+        cache: Optional coordination.FetchCache; live non-streamed GETs share fetches through it
+    """
+
+    def __init__(self, mode: str = "live", cassette_dir: str = DEFAULT_CASSETTE_DIR, session=None,
+                 latency_ms: Optional[float] = 0, jitter_ms: float = 0, seed: Optional[int] = None,
+                 limiter=None, cache=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown transport mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.store = CassetteStore(cassette_dir)
+        self.session = session
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.limiter = limiter
+        self.cache = cache
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, session=None) -> "Transport":
+        """
+        Build a Transport from REC_TRANSPORT, REC_CASSETTE_DIR, REC_REPLAY_LATENCY_MS
+        ("recorded" for the recorded latency), REC_REPLAY_JITTER_MS and REC_REPLAY_SEED
+
+        Requests that reach rec.us share the process-wide rate limiter; replays
+        are only paced if REC_RATE_PER_SEC is set explicitly. Live mode uses
+        the fetch cache from REC_COORDINATION_DB if REC_FETCH_CACHE_TTL is set.
+        """
+        from coordination import FetchCache
+        from rate_limit import shared_limiter
+
+        mode = os.environ.get("REC_TRANSPORT", "live")
+        latency = os.environ.get("REC_REPLAY_LATENCY_MS", "0")
+        seed = os.environ.get("REC_REPLAY_SEED")
+        paced = mode != "replay" or "REC_RATE_PER_SEC" in os.environ
+        return cls(
+            mode=mode,
+            cassette_dir=os.environ.get("REC_CASSETTE_DIR", DEFAULT_CASSETTE_DIR),
+            session=session,
+            latency_ms=None if latency == "recorded" else float(latency),
+            jitter_ms=float(os.environ.get("REC_REPLAY_JITTER_MS", "0")),
+            seed=int(seed) if seed is not None else None,
+            limiter=shared_limiter() if paced else None,
+            cache=FetchCache.from_env() if mode == "live" else None,
+        )
+
+    def _http(self):
+        if self.session is not None:
+            return self.session
+        import requests
+
+        return requests
+
+    def _replay_delay(self, recorded_ms: Optional[float]) -> float:
+        base = (recorded_ms or 0) if self.latency_ms is None else self.latency_ms
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, base + jitter) / 1000
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: float = 10, stream: bool = False) -> "requests.Response":
+        """
+        GET a URL in the configured mode
+
+        stream=True is passed through to requests for live requests. Recording
+        needs the whole body, so record mode downloads it before returning.
+
+        With a limiter, each attempt waits for a token, and 429s (or 503s with
+        Retry-After) are retried up to limiter.max_retries times; the last
+        response is returned either way.
+
+        With a cache, a live non-streamed GET answered within the cache TTL,
+        or already in flight in this or another process, is not sent again.
+
+        Returns:
+            A requests.Response; replayed and cached responses are rebuilt from the stored body
+
+        Raises:
+            CassetteMissError: in replay mode, if the request was never recorded
+        """
+        if self.cache is not None and self.mode == "live" and not stream:
+            def fetch():
+                response = self._get(url, params, headers, timeout, stream)
+                return response.status_code, response.headers.get("Content-Type"), response.content
+
+            status_code, content_type, content = self.cache.get_or_fetch(
+                request_key(url, params), fetch, wait_seconds=timeout
+            )
+            return self._build_response(url, params, status_code, content, content_type)
+        return self._get(url, params, headers, timeout, stream)
+
+    def _get(self, url: str, params: Optional[Dict], headers: Optional[Dict], timeout: float,
+             stream: bool) -> "requests.Response":
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+            started = time.perf_counter()
+            response = self._send(url, params, headers, timeout, stream)
+            if not self.limiter:
+                break
+            throttled = self.limiter.on_response(response.status_code, response.headers.get("Retry-After"))
+            if not throttled or attempt >= self.limiter.max_retries:
+                break
+            response.close()
+            self.limiter.note_retry()
+            attempt += 1
+
+        if self.mode == "record":
+            self.store.save(
+                "GET", url, params, response.status_code, response.content,
+                content_type=response.headers.get("Content-Type"),
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
+        return response
+
+    def _send(self, url: str, params: Optional[Dict], headers: Optional[Dict], timeout: float,
+              stream: bool) -> "requests.Response":
+        if self.mode == "replay":
+            return self._replay(url, params)
+        return self._http().get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+
+    def _replay(self, url: str, params: Optional[Dict]) -> "requests.Response":
+        entry, content = self.store.load("GET", url, params)
+        delay = self._replay_delay(entry.get("elapsed_ms"))
+        if delay:
+            time.sleep(delay)
+        return self._build_response(url, params, entry["status_code"], content, entry.get("content_type"))
+
+    @staticmethod
+    def _build_response(url: str, params: Optional[Dict], status_code: int, content: bytes,
+                        content_type: Optional[str]) -> "requests.Response":
+        import requests
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = content
+        # Lets iter_content() stream from the stored body
+        response._content_consumed = True
+        response.url = url if not params else f"{url}?{urlencode(params)}"
+        if content_type:
+            response.headers["Content-Type"] = content_type
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_default_transport: Optional[Transport] = None
+
+
+def default_transport() -> Transport:
+    """Process-wide Transport configured from the environment, for callers without a session"""
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = Transport.from_env()
+    return _default_transport
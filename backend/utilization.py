@@ -0,0 +1,424 @@
+"""
+Court utilization analytics over scrape history
+Updated incrementally from each scrape: consecutive scrapes are diffed as
+per-court-per-day bitmaps, and the results go into fixed-size per-hour-of-week
+arrays, so dashboards query rolling aggregates instead of rescanning dumps
+
+Metrics:
+    occupancy     share of offered slot starts that were booked before they began
+    time to book  minutes from a slot first appearing (its release) to it being taken
+    peak windows  hours of the week with the most bookings
+
+Usage:
+    python utilization.py rebuild --snapshots data/snapshots   # replay columnar history
+    python utilization.py report [--location <id>] [--sport tennis]
+"""
+
+import argparse
+import json
+import os
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from availability_bitmap import COURT_TIMEZONE, SLOT_MINUTES, aligned_slots, pack_slots
+
+HOURS_PER_WEEK = 7 * 24
+
+# Upper bounds (minutes) of the time-to-book histogram buckets; one overflow bucket follows
+TIME_TO_BOOK_BUCKETS = [5, 15, 30, 60, 120, 240, 480, 1440, 2880, 10080]
+
+DEFAULT_STATE_PATH = "data/utilization.json"
+
+ALL = "*"
+
+
+def _bits(bitmap: int) -> Iterable[int]:
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def _court_now() -> datetime:
+    from zoneinfo import ZoneInfo
+
+    return datetime.now(ZoneInfo(COURT_TIMEZONE)).replace(tzinfo=None)
+
+
+class Aggregate:
+    """
+    Rolling counters for one court or one rollup (location, sport, everything)
+
+    offered/booked are indexed by hour of the week of the slot start
+    (Monday 00:00 = 0). Time-to-book is kept as a histogram plus a running sum.
+    """
+
+    __slots__ = ("offered", "booked", "book_histogram", "book_minutes_total")
+
+    def __init__(self):
+        self.offered = array("I", bytes(4 * HOURS_PER_WEEK))
+        self.booked = array("I", bytes(4 * HOURS_PER_WEEK))
+        self.book_histogram = array("I", bytes(4 * (len(TIME_TO_BOOK_BUCKETS) + 1)))
+        self.book_minutes_total = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "offered": self.offered.tolist(),
+            "booked": self.booked.tolist(),
+            "book_histogram": self.book_histogram.tolist(),
+            "book_minutes_total": self.book_minutes_total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Aggregate":
+        aggregate = cls()
+        aggregate.offered = array("I", data["offered"])
+        aggregate.booked = array("I", data["booked"])
+        aggregate.book_histogram = array("I", data["book_histogram"])
+        aggregate.book_minutes_total = data["book_minutes_total"]
+        return aggregate
+
+
+def _bucket(minutes: float) -> int:
+    for i, bound in enumerate(TIME_TO_BOOK_BUCKETS):
+        if minutes <= bound:
+            return i
+    return len(TIME_TO_BOOK_BUCKETS)
+
+
+class UtilizationTracker:
+    """
+    Incremental utilization aggregates fed one scrape at a time
+
+    Keeps the last seen bitmap per (court_id, date) plus the time each open
+    slot was first seen; everything else is counters. Each bump is applied to
+    the court's Aggregate and to its location, sport, location+sport and
+    overall rollups, so every query reads a single 168-entry array.
+
+    Slots already open in the first scrape count as offered, but their release
+    time is unknown, so they are left out of time-to-book.
+    """
+
+    def __init__(self):
+        self.aggregates: Dict[Tuple[str, str, str], Aggregate] = {}
+        # court_id -> (location_id, court_type)
+        self.courts: Dict[str, Tuple[str, str]] = {}
+        self._open: Dict[Tuple[str, str], int] = {}
+        # (court_id, date) -> epoch seconds each open slot was first seen; 0 = unknown
+        self._first_seen: Dict[Tuple[str, str], array] = {}
+        self.scrapes = 0
+        self.last_scraped_at: Optional[str] = None
+
+    def _targets(self, court_id: str) -> List[Aggregate]:
+        location_id, court_type = self.courts[court_id]
+        keys = [
+            ("court", court_id, ALL),
+            ("location", location_id, court_type),
+            ("location", location_id, ALL),
+            ("location", ALL, court_type),
+            ("location", ALL, ALL),
+        ]
+        targets = []
+        for key in keys:
+            aggregate = self.aggregates.get(key)
+            if aggregate is None:
+                aggregate = self.aggregates[key] = Aggregate()
+            targets.append(aggregate)
+        return targets
+
+    def observe(self, slots: List[Dict], scraped_at: Optional[datetime] = None,
+                location_ids: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Fold one scrape into the aggregates
+
+        Args:
+            slots: Slot dicts from scraper.scrape_all_locations (the full current state)
+            scraped_at: Scrape time in court-local time (default: now)
+            location_ids: Locations this scrape actually covered; slots of other
+                locations are left as they were, so a failed fetch isn't read as
+                every court being booked. Defaults to the locations present in slots.
+
+        Returns:
+            Counts of slots opened and booked in this scrape
+        """
+        scraped_at = scraped_at or _court_now()
+        now = scraped_at.timestamp()
+        first_scrape = self.scrapes == 0
+
+        current: Dict[Tuple[str, str], int] = {}
+        try:
+            records = pack_slots(slots)
+        except ValueError:
+            records = pack_slots(aligned_slots(slots))
+        for record in records:
+            self.courts[record["court_id"]] = (record["location_id"], record.get("court_type") or "")
+            current[(record["court_id"], record["date"])] = record["slot_bitmap"]
+        if location_ids is None:
+            location_ids = {slot["location_id"] for slot in slots}
+        covered = set(location_ids)
+
+        opened_count = booked_count = 0
+        today = scraped_at.strftime("%Y-%m-%d")
+        for key in set(self._open) | set(current):
+            court_id, slot_date = key
+            if self.courts[court_id][0] not in covered:
+                continue
+            previous = self._open.get(key, 0)
+            bitmap = current.get(key, 0)
+            opened, closed = bitmap & ~previous, previous & ~bitmap
+            if not opened and not closed:
+                continue
+
+            targets = self._targets(court_id)
+            day = datetime.strptime(slot_date, "%Y-%m-%d")
+            first_seen = self._first_seen.get(key)
+            if first_seen is None:
+                first_seen = self._first_seen[key] = array("d", bytes(8 * (24 * 60 // SLOT_MINUTES)))
+
+            for index in _bits(opened):
+                start = day + timedelta(minutes=index * SLOT_MINUTES)
+                hour = start.weekday() * 24 + start.hour
+                for aggregate in targets:
+                    aggregate.offered[hour] += 1
+                first_seen[index] = 0.0 if first_scrape else now
+                opened_count += 1
+
+            for index in _bits(closed):
+                start = day + timedelta(minutes=index * SLOT_MINUTES)
+                if start <= scraped_at:
+                    # Expired rather than booked
+                    continue
+                hour = start.weekday() * 24 + start.hour
+                released = first_seen[index]
+                minutes = (now - released) / 60 if released else None
+                for aggregate in targets:
+                    aggregate.booked[hour] += 1
+                    if minutes is not None:
+                        aggregate.book_histogram[_bucket(minutes)] += 1
+                        aggregate.book_minutes_total += minutes
+                first_seen[index] = 0.0
+                booked_count += 1
+
+            if bitmap:
+                self._open[key] = bitmap
+            else:
+                self._open.pop(key, None)
+
+        # Past dates can't change any more
+        for key in [key for key in self._open if key[1] < today]:
+            del self._open[key]
+        for key in [key for key in self._first_seen if key[1] < today]:
+            del self._first_seen[key]
+
+        self.scrapes += 1
+        self.last_scraped_at = scraped_at.isoformat()
+        return {"opened": opened_count, "booked": booked_count}
+
+    # Queries: each reads one pre-rolled-up Aggregate
+
+    def _aggregate(self, location_id: Optional[str] = None, court_type: Optional[str] = None,
+                   court_id: Optional[str] = None) -> Aggregate:
+        if court_id is not None:
+            key = ("court", court_id, ALL)
+        else:
+            key = ("location", location_id or ALL, court_type or ALL)
+        return self.aggregates.get(key) or Aggregate()
+
+    def occupancy(self, location_id: Optional[str] = None, court_type: Optional[str] = None,
+                  court_id: Optional[str] = None) -> Optional[float]:
+        """Booked / offered slot starts, or None if nothing has been offered"""
+        aggregate = self._aggregate(location_id, court_type, court_id)
+        offered = sum(aggregate.offered)
+        return sum(aggregate.booked) / offered if offered else None
+
+    def occupancy_by_hour(self, location_id: Optional[str] = None, court_type: Optional[str] = None,
+                          court_id: Optional[str] = None) -> List[Optional[float]]:
+        """168 occupancy rates by hour of the week (Monday 00:00 first), None where nothing was offered"""
+        aggregate = self._aggregate(location_id, court_type, court_id)
+        return [booked / offered if offered else None
+                for booked, offered in zip(aggregate.booked, aggregate.offered)]
+
+    def time_to_book(self, location_id: Optional[str] = None, court_type: Optional[str] = None,
+                     court_id: Optional[str] = None) -> Dict:
+        """
+        How quickly released slots get booked
+
+        Returns:
+            Dict with count, mean_minutes, median_minutes (the upper bound of the
+            histogram bucket holding the median; None in the overflow bucket)
+            and histogram as [(bucket upper bound or None, count)]
+        """
+        aggregate = self._aggregate(location_id, court_type, court_id)
+        count = sum(aggregate.book_histogram)
+        bounds = TIME_TO_BOOK_BUCKETS + [None]
+        median = None
+        running = 0
+        for bound, bucket_count in zip(bounds, aggregate.book_histogram):
+            running += bucket_count
+            if count and running >= count / 2:
+                median = bound
+                break
+        return {
+            "count": count,
+            "mean_minutes": round(aggregate.book_minutes_total / count, 1) if count else None,
+            "median_minutes": median,
+            "histogram": list(zip(bounds, aggregate.book_histogram.tolist())),
+        }
+
+    def peak_windows(self, top: int = 5, location_id: Optional[str] = None,
+                     court_type: Optional[str] = None) -> List[Dict]:
+        """
+        Hours of the week with the most bookings
+
+        Returns:
+            Up to `top` dicts of weekday (0 = Monday), hour, booked, offered, occupancy
+        """
+        aggregate = self._aggregate(location_id, court_type)
+        hours = sorted(range(HOURS_PER_WEEK), key=lambda h: aggregate.booked[h], reverse=True)
+        return [
+            {
+                "weekday": hour // 24,
+                "hour": hour % 24,
+                "booked": aggregate.booked[hour],
+                "offered": aggregate.offered[hour],
+                "occupancy": aggregate.booked[hour] / aggregate.offered[hour] if aggregate.offered[hour] else None,
+            }
+            for hour in hours[:top] if aggregate.booked[hour]
+        ]
+
+    def court_occupancy(self) -> List[Dict]:
+        """Per-court occupancy, highest first"""
+        rows = []
+        for court_id, (location_id, court_type) in self.courts.items():
+            rows.append({
+                "court_id": court_id,
+                "location_id": location_id,
+                "court_type": court_type,
+                "occupancy": self.occupancy(court_id=court_id),
+            })
+        rows.sort(key=lambda row: row["occupancy"] or 0, reverse=True)
+        return rows
+
+    # Persistence, so a restarted daemon keeps its history
+
+    def to_dict(self) -> Dict:
+        return {
+            "scrapes": self.scrapes,
+            "last_scraped_at": self.last_scraped_at,
+            "courts": {court_id: list(meta) for court_id, meta in self.courts.items()},
+            "aggregates": [[*key, aggregate.to_dict()] for key, aggregate in self.aggregates.items()],
+            "open": [[court_id, date, bitmap, self._first_seen.get((court_id, date), array("d")).tolist()]
+                     for (court_id, date), bitmap in self._open.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UtilizationTracker":
+        tracker = cls()
+        tracker.scrapes = data["scrapes"]
+        tracker.last_scraped_at = data.get("last_scraped_at")
+        tracker.courts = {court_id: tuple(meta) for court_id, meta in data["courts"].items()}
+        tracker.aggregates = {(kind, a, b): Aggregate.from_dict(values) for kind, a, b, values in data["aggregates"]}
+        for court_id, date, bitmap, first_seen in data["open"]:
+            tracker._open[(court_id, date)] = bitmap
+            if first_seen:
+                tracker._first_seen[(court_id, date)] = array("d", first_seen)
+        return tracker
+
+    def save(self, path: str = DEFAULT_STATE_PATH):
+        """Write state atomically (temp file, then rename)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_STATE_PATH) -> "UtilizationTracker":
+        """Load saved state, or start empty if there is none"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def rebuild_from_snapshots(root: str, fmt: str = "arrow") -> UtilizationTracker:
+    """
+    Replay a columnar snapshot dataset (snapshots.py) scrape by scrape
+
+    Snapshots store scraped_at in UTC; it is converted to court-local time.
+    """
+    from zoneinfo import ZoneInfo
+
+    from snapshots import open_snapshots
+
+    columns = ["scraped_at", "location_id", "court_id", "court_type", "slot_datetime"]
+    table = open_snapshots(root, fmt).to_table(columns=columns).sort_by("scraped_at")
+    tracker = UtilizationTracker()
+    court_tz = ZoneInfo(COURT_TIMEZONE)
+
+    batch: List[Dict] = []
+    batch_time = None
+    for row in table.to_pylist():
+        if batch_time is not None and row["scraped_at"] != batch_time:
+            tracker.observe(batch, batch_time.astimezone(court_tz).replace(tzinfo=None))
+            batch = []
+        batch_time = row["scraped_at"]
+        slot_datetime = row["slot_datetime"]
+        batch.append({
+            "location_id": row["location_id"],
+            "court_id": row["court_id"],
+            "court_type": row["court_type"],
+            "date": slot_datetime.strftime("%Y-%m-%d"),
+            "time": slot_datetime.strftime("%H:%M:%S"),
+        })
+    if batch:
+        tracker.observe(batch, batch_time.astimezone(court_tz).replace(tzinfo=None))
+    return tracker
+
+
+def _print_report(tracker: UtilizationTracker, location_id: Optional[str], court_type: Optional[str]):
+    weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    occupancy = tracker.occupancy(location_id, court_type)
+    print(f"Scrapes observed: {tracker.scrapes} (last {tracker.last_scraped_at})")
+    print(f"Occupancy: {occupancy:.1%}" if occupancy is not None else "Occupancy: no data")
+    booking = tracker.time_to_book(location_id, court_type)
+    print(f"Time to book: {booking['count']} bookings, mean {booking['mean_minutes']} min, "
+          f"median <= {booking['median_minutes']} min")
+    print("Peak windows:")
+    for window in tracker.peak_windows(5, location_id, court_type):
+        print(f"  {weekdays[window['weekday']]} {window['hour']:02d}:00  "
+              f"{window['booked']} booked / {window['offered']} offered")
+    if location_id is None and court_type is None:
+        print("Busiest courts:")
+        for row in tracker.court_occupancy()[:5]:
+            occupancy = f"{row['occupancy']:.1%}" if row["occupancy"] is not None else "no data"
+            print(f"  {row['court_id']} ({row['court_type']}): {occupancy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Court utilization analytics")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Saved tracker state")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild", help="Recompute state from columnar snapshots")
+    rebuild.add_argument("--snapshots", default="data/snapshots")
+    rebuild.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+
+    report = subparsers.add_parser("report", help="Print occupancy, time to book and peak windows")
+    report.add_argument("--location", help="Location ID")
+    report.add_argument("--sport", help="tennis or pickleball")
+
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        tracker = rebuild_from_snapshots(args.snapshots, args.format)
+        tracker.save(args.state)
+        print(f"Rebuilt {args.state} from {tracker.scrapes} scrapes")
+    else:
+        _print_report(UtilizationTracker.load(args.state), args.location, args.sport)
+
+
+if __name__ == "__main__":
+    main()
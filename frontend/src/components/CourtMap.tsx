@@ -1,11 +1,11 @@
 "use client";
 
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState } from "react";
 import dynamic from "next/dynamic";
 import { format } from "date-fns";
 import { supabase } from "@/lib/supabase";
 import { getLocationWebsiteUrl } from "@/lib/locationSlugs";
-import type { LocationWithSlots, Location, Availability } from "@/types";
+import type { LocationWithSlots, AvailableCourtsRow } from "@/types";
 import type { SportFilter } from "@/app/page";
 
 // Dynamically import map to avoid SSR issues
@@ -39,31 +39,21 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
       try {
         const dateStr = format(selectedDate, "yyyy-MM-dd");
 
-        // Fetch all locations
-        const { data: locationsData, error: locationsError } = await supabase
-          .from("locations")
-          .select("*")
-          .order("name");
-
-        if (locationsError) throw locationsError;
-
-        // Fetch availability for selected date
-        const { data: availabilityData, error: availabilityError } = await supabase
-          .from("availability")
-          .select("*")
-          .eq("date", dateStr)
-          .eq("is_available", true)
-          .order("time");
+        // Locations with their available slots for the date, already filtered by
+        // sport, deduplicated by time + duration and sorted server-side
+        const { data, error: rpcError } = await supabase.rpc("get_available_courts", {
+          p_date: dateStr,
+          p_sport: sportFilter === "both" ? null : sportFilter,
+        });
 
-        if (availabilityError) throw availabilityError;
+        if (rpcError) throw rpcError;
 
-        // Group availability by location
-        const locationsWithSlots: LocationWithSlots[] = (locationsData as Location[]).map((location) => ({
-          ...location,
-          availableSlots: (availabilityData as Availability[]).filter(
-            (slot) => slot.location_id === location.id
-          ),
-        }));
+        const locationsWithSlots: LocationWithSlots[] = (data as AvailableCourtsRow[]).map(
+          ({ available_slots, ...location }) => ({
+            ...location,
+            availableSlots: available_slots,
+          })
+        );
 
         // Include all locations (both available and unavailable)
         setLocations(locationsWithSlots);
@@ -76,26 +66,7 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
     }
 
     fetchCourtData();
-  }, [selectedDate]);
-
-  // Filter locations based on sport filter (must be before conditional returns)
-  const filteredLocations = useMemo(() => {
-    return locations.map((location) => {
-      let filteredSlots = location.availableSlots;
-      
-      if (sportFilter !== "both") {
-        filteredSlots = location.availableSlots.filter((slot) => {
-          const slotSport = slot.court_type || "";
-          return slotSport === sportFilter;
-        });
-      }
-      
-      return {
-        ...location,
-        availableSlots: filteredSlots,
-      };
-    });
-  }, [locations, sportFilter]);
+  }, [selectedDate, sportFilter]);
 
   if (loading) {
     return (
@@ -117,7 +88,7 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
   }
 
   // Filter locations with coordinates
-  const locationsWithCoordinates = filteredLocations.filter((loc) => loc.lat && loc.lng);
+  const locationsWithCoordinates = locations.filter((loc) => loc.lat && loc.lng);
   
   if (locationsWithCoordinates.length === 0) {
     return (
@@ -133,21 +104,21 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
     <div className="space-y-6">
       <div className="flex items-center justify-between">
         <p className="text-sm text-gray-600">
-          Showing <span className="font-semibold">{filteredLocations.filter(loc => loc.availableSlots.length > 0).length}</span> locations with available courts
-          {filteredLocations.filter(loc => loc.availableSlots.length === 0).length > 0 && (
+          Showing <span className="font-semibold">{locations.filter(loc => loc.availableSlots.length > 0).length}</span> locations with available courts
+          {locations.filter(loc => loc.availableSlots.length === 0).length > 0 && (
             <span className="ml-2 text-gray-500">
-              ({filteredLocations.filter(loc => loc.availableSlots.length === 0).length} unavailable)
+              ({locations.filter(loc => loc.availableSlots.length === 0).length} unavailable)
             </span>
           )}
         </p>
       </div>
-      <MapComponent locations={filteredLocations} />
+      <MapComponent locations={locations} />
 
       {/* List View */}
       <div className="space-y-4">
         <h3 className="text-lg font-semibold text-gray-900">Available Courts List</h3>
         <div className="grid gap-4">
-          {filteredLocations.filter(loc => loc.availableSlots.length > 0).map((location) => {
+          {locations.filter(loc => loc.availableSlots.length > 0).map((location) => {
             return (
               <div
                 key={location.id}
@@ -165,7 +136,7 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
                       ${(location.availableSlots[0]?.price_cents || 0) / 100}/hr
                     </p>
                     <p className="text-xs text-gray-500 mt-1">
-                      {location.availableSlots.length} slots
+                      {location.availableSlots.length} open times
                     </p>
                   </div>
                 </div>
@@ -205,54 +176,41 @@ export default function CourtMap({ selectedDate, sportFilter }: CourtMapProps) {
                             </span>
                           </div>
                           <div className="flex flex-wrap gap-2">
-                            {(() => {
-                              // Deduplicate slots by time + duration (keep only unique combinations)
-                              const uniqueSlotsMap = slots.reduce((acc, slot) => {
-                                const key = `${slot.time}-${slot.duration_minutes || 'no-duration'}`;
-                                if (!acc.has(key)) {
-                                  acc.set(key, slot);
-                                }
-                                return acc;
-                              }, new Map());
+                            {/* Slots arrive deduplicated by time + duration and sorted by time */}
+                            {slots.map((slot) => {
+                              const websiteUrl = getLocationWebsiteUrl(location.name);
+                              const timeStr = format(new Date(`2000-01-01T${slot.time}`), "h:mm a");
+                              const duration = slot.duration_minutes;
                               
-                              // Sort unique slots by time
-                              const uniqueSlots = Array.from(uniqueSlotsMap.values()).sort((a, b) => a.time.localeCompare(b.time));
-                              
-                              return uniqueSlots.map((slot) => {
-                                const websiteUrl = getLocationWebsiteUrl(location.name);
-                                const timeStr = format(new Date(`2000-01-01T${slot.time}`), "h:mm a");
-                                const duration = slot.duration_minutes;
-                                
-                                if (websiteUrl) {
-                                  return (
-                                    <a
-                                      key={`${slot.time}-${slot.duration_minutes || 'no-duration'}`}
-                                      href={websiteUrl}
-                                      target="_blank"
-                                      rel="noopener noreferrer"
-                                      className="inline-flex flex-col items-center justify-center px-3 py-1.5 bg-green-50 border border-green-200 text-green-700 text-sm rounded-md hover:bg-green-100 transition-colors cursor-pointer min-w-[70px]"
-                                    >
-                                      <span className="font-medium">{timeStr}</span>
-                                      {duration && (
-                                        <span className="text-xs text-green-600 mt-0.5">{duration} min</span>
-                                      )}
-                                    </a>
-                                  );
-                                }
-                                
+                              if (websiteUrl) {
                                 return (
-                                  <span
+                                  <a
                                     key={`${slot.time}-${slot.duration_minutes || 'no-duration'}`}
-                                    className="inline-flex flex-col items-center justify-center px-3 py-1.5 bg-green-50 border border-green-200 text-green-700 text-sm rounded-md min-w-[70px]"
+                                    href={websiteUrl}
+                                    target="_blank"
+                                    rel="noopener noreferrer"
+                                    className="inline-flex flex-col items-center justify-center px-3 py-1.5 bg-green-50 border border-green-200 text-green-700 text-sm rounded-md hover:bg-green-100 transition-colors cursor-pointer min-w-[70px]"
                                   >
                                     <span className="font-medium">{timeStr}</span>
                                     {duration && (
                                       <span className="text-xs text-green-600 mt-0.5">{duration} min</span>
                                     )}
-                                  </span>
+                                  </a>
                                 );
-                              });
-                            })()}
+                              }
+                              
+                              return (
+                                <span
+                                  key={`${slot.time}-${slot.duration_minutes || 'no-duration'}`}
+                                  className="inline-flex flex-col items-center justify-center px-3 py-1.5 bg-green-50 border border-green-200 text-green-700 text-sm rounded-md min-w-[70px]"
+                                >
+                                  <span className="font-medium">{timeStr}</span>
+                                  {duration && (
+                                    <span className="text-xs text-green-600 mt-0.5">{duration} min</span>
+                                  )}
+                                </span>
+                              );
+                            })}
                           </div>
                         </div>
                       );
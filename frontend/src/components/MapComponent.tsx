@@ -174,7 +174,7 @@ export default function MapComponent({ locations, sportFilter = "both" }: MapCom
             <h3 class="font-bold text-sm sm:text-lg mb-1">${location.name}</h3>
             ${location.address ? `<p class="text-xs sm:text-sm text-gray-600">${location.address}</p>` : ""}
             <div class="flex items-center justify-between text-xs sm:text-sm mt-2">
-              <span class="font-semibold">${location.availableSlots.length} available slots</span>
+              <span class="font-semibold">${location.availableSlots.length} open times</span>
               <span class="text-gray-600">$${(location.availableSlots[0]?.price_cents || 0) / 100}/hr</span>
             </div>
           </div>
@@ -202,18 +202,8 @@ export default function MapComponent({ locations, sportFilter = "both" }: MapCom
                         }">${sportTypeLabel}</span>`
                       : "";
                     
-                    // Deduplicate slots by time + duration (keep only unique combinations)
-                    const uniqueSlots = slots.reduce((acc, slot) => {
-                      const key = `${slot.time}-${slot.duration_minutes || 'no-duration'}`;
-                      if (!acc.has(key)) {
-                        acc.set(key, slot);
-                      }
-                      return acc;
-                    }, new Map());
-                    
-                    // Sort unique slots by time
-                    const sortedSlots = Array.from(uniqueSlots.values()).sort((a, b) => a.time.localeCompare(b.time));
-                    const slotButtons = sortedSlots
+                    // Slots arrive deduplicated by time + duration and sorted by time
+                    const slotButtons = slots
                       .map((slot) => {
                         const timeStr = format(new Date(`2000-01-01T${slot.time}`), "h:mm a");
                         const duration = slot.duration_minutes;
@@ -27,6 +27,14 @@ export interface Availability {
   created_at: string;
 }
 
+// One deduplicated (sport, time, duration) entry from the get_available_courts RPC
+export type AvailableSlot = Pick<Availability, "time" | "duration_minutes" | "court_type" | "price_cents">;
+
+// Row shape returned by the get_available_courts RPC
+export interface AvailableCourtsRow extends Location {
+  available_slots: AvailableSlot[];
+}
+
 export interface LocationWithSlots extends Location {
-  availableSlots: Availability[];
+  availableSlots: AvailableSlot[];
 }
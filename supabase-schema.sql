@@ -15,8 +15,12 @@ CREATE TABLE IF NOT EXISTS locations (
 );
 
 -- Availability table: Stores available time slots for courts
+-- Range-partitioned by date, one partition per day, so date-filtered queries
+-- prune to a single partition and expired days are dropped instead of deleted.
+-- Partitions are created/dropped by the functions below, called daily from
+-- backend/maintenance.py.
 CREATE TABLE IF NOT EXISTS availability (
-    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    id UUID DEFAULT gen_random_uuid(),
     location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
     location_name TEXT NOT NULL,
     court_id UUID NOT NULL,
@@ -26,33 +30,124 @@ CREATE TABLE IF NOT EXISTS availability (
     time TIME NOT NULL,
     price_cents INTEGER DEFAULT 0,
     price_type TEXT DEFAULT 'perHour',
+    court_type TEXT,
     duration_minutes INTEGER,
     is_available BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    UNIQUE(court_id, slot_datetime)
-);
+    -- Unique constraints on a partitioned table must include the partition key
+    PRIMARY KEY (id, date),
+    UNIQUE (court_id, slot_datetime, date)
+) PARTITION BY RANGE (date);
 
--- Create indexes for better query performance
-CREATE INDEX IF NOT EXISTS idx_availability_location_id ON availability(location_id);
-CREATE INDEX IF NOT EXISTS idx_availability_date ON availability(date);
-CREATE INDEX IF NOT EXISTS idx_availability_court_id ON availability(court_id);
-CREATE INDEX IF NOT EXISTS idx_availability_slot_datetime ON availability(slot_datetime);
-CREATE INDEX IF NOT EXISTS idx_availability_is_available ON availability(is_available);
+-- Catches rows outside the pre-created range so inserts never fail
+CREATE TABLE IF NOT EXISTS availability_default PARTITION OF availability DEFAULT;
+ALTER TABLE availability_default ENABLE ROW LEVEL SECURITY;
 
--- Create a compound index for common queries
-CREATE INDEX IF NOT EXISTS idx_availability_date_location ON availability(date, location_id);
+-- One partial index shaped for the frontend's query:
+--   WHERE date = ? AND is_available [AND court_type = ?] ORDER BY time
+-- (the UNIQUE constraint above covers upserts; more indexes only slow the per-scrape rewrite)
+CREATE INDEX IF NOT EXISTS idx_availability_open_by_date_sport
+    ON availability (date, court_type, time)
+    INCLUDE (location_id, duration_minutes, price_cents)
+    WHERE is_available;
 
 -- Add comments for documentation
 COMMENT ON TABLE locations IS 'Tennis and pickleball court locations in San Francisco';
-COMMENT ON TABLE availability IS 'Available time slots for court reservations';
+COMMENT ON TABLE availability IS 'Available time slots for court reservations (partitioned by date)';
 
 COMMENT ON COLUMN availability.slot_datetime IS 'Full datetime of the available slot';
-COMMENT ON COLUMN availability.date IS 'Date component for easy filtering';
+COMMENT ON COLUMN availability.date IS 'Date component for easy filtering (partition key)';
 COMMENT ON COLUMN availability.time IS 'Time component for easy filtering';
 COMMENT ON COLUMN availability.price_cents IS 'Price in cents (e.g., 500 = $5.00)';
 COMMENT ON COLUMN availability.price_type IS 'Pricing type (e.g., perHour)';
 COMMENT ON COLUMN availability.duration_minutes IS 'Duration of the booking slot in minutes (e.g., 30, 60, 90)';
 
+-- Create one partition per day from start_date for days_ahead days (idempotent)
+CREATE OR REPLACE FUNCTION create_availability_partitions(days_ahead INTEGER DEFAULT 60, start_date DATE DEFAULT CURRENT_DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..days_ahead LOOP
+        day := start_date + i;
+        partition_name := 'availability_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass('public.' || partition_name) IS NULL THEN
+            -- Build the partition standalone, move any rows for this day out of the
+            -- default partition, then attach (attaching fails if default still has them)
+            EXECUTE format(
+                'CREATE TABLE public.%I (LIKE public.availability INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'INSERT INTO public.%I SELECT * FROM public.availability_default WHERE date = %L',
+                partition_name, day
+            );
+            DELETE FROM availability_default WHERE date = day;
+            EXECUTE format(
+                'ALTER TABLE public.availability ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, day, day + 1
+            );
+            -- Partitions are reachable directly through the API; RLS without policies
+            -- blocks that, while reads through the parent use its policies
+            EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- Drop daily partitions for dates before CURRENT_DATE - retain_days (O(1) per day)
+CREATE OR REPLACE FUNCTION drop_expired_availability_partitions(retain_days INTEGER DEFAULT 0)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+    cutoff TEXT := 'availability_p' || to_char(CURRENT_DATE - retain_days, 'YYYYMMDD');
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'availability'
+          AND c.relname ~ '^availability_p[0-9]{8}$'
+          AND c.relname < cutoff
+    LOOP
+        EXECUTE format('DROP TABLE public.%I', part.relname);
+        dropped := dropped + 1;
+    END LOOP;
+    -- Rows that landed in the default partition are cleaned up the slow way
+    DELETE FROM availability_default WHERE date < CURRENT_DATE - retain_days;
+    RETURN dropped;
+END;
+$$;
+
+-- Full replace for each scrape: TRUNCATE is O(partitions) instead of a DELETE scan
+CREATE OR REPLACE FUNCTION truncate_availability()
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    TRUNCATE availability;
+$$;
+
+-- Maintenance functions are for the scraper (service role) only
+REVOKE EXECUTE ON FUNCTION create_availability_partitions(INTEGER, DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION drop_expired_availability_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION truncate_availability() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_availability_partitions(INTEGER, DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_expired_availability_partitions(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION truncate_availability() TO service_role;
+
+-- Partitions for today and the booking horizon
+SELECT create_availability_partitions(60);
+
 -- Optional: Create a view for easier querying
 CREATE OR REPLACE VIEW availability_with_location AS
 SELECT
@@ -83,3 +178,183 @@ CREATE POLICY "Allow public read access on availability"
 
 -- Note: For write access (your scraper), you'll use the service role key
 -- which bypasses RLS policies
+
+-- Map query: every location with its available slots for a date, deduplicated
+-- per (court_type, time, duration) and sorted by time, in one grouped scan of
+-- idx_availability_open_by_date_sport. Called by frontend/src/components/CourtMap.tsx
+CREATE OR REPLACE FUNCTION get_available_courts(p_date DATE, p_sport TEXT DEFAULT NULL)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    address TEXT,
+    lat NUMERIC,
+    lng NUMERIC,
+    hours_of_operation TEXT,
+    description TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    available_slots JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH slots AS (
+        -- One row per (location, sport, start time, duration), as the map renders them
+        SELECT DISTINCT ON (a.location_id, a.court_type, a.time, a.duration_minutes)
+            a.location_id, a.time, a.duration_minutes, a.court_type, a.price_cents
+        FROM availability a
+        WHERE a.date = p_date
+          AND a.is_available
+          AND (p_sport IS NULL OR a.court_type = p_sport)
+        ORDER BY a.location_id, a.court_type, a.time, a.duration_minutes, a.price_cents
+    ),
+    by_location AS (
+        SELECT
+            s.location_id,
+            jsonb_agg(
+                jsonb_build_object(
+                    'time', s.time,
+                    'duration_minutes', s.duration_minutes,
+                    'court_type', s.court_type,
+                    'price_cents', s.price_cents
+                )
+                ORDER BY s.time, s.court_type, s.duration_minutes
+            ) AS available_slots
+        FROM slots s
+        GROUP BY s.location_id
+    )
+    SELECT
+        l.id, l.name, l.address, l.lat, l.lng, l.hours_of_operation, l.description,
+        l.created_at, l.updated_at,
+        COALESCE(b.available_slots, '[]'::jsonb) AS available_slots
+    FROM locations l
+    LEFT JOIN by_location b ON b.location_id = l.id
+    ORDER BY l.name;
+$$;
+
+COMMENT ON FUNCTION get_available_courts(DATE, TEXT) IS
+    'Locations with deduplicated available slots for a date, optionally filtered by court_type';
+
+-- Called by the frontend with the anon key
+GRANT EXECUTE ON FUNCTION get_available_courts(DATE, TEXT) TO anon, authenticated;
+
+-- Compact availability format: one row per (court_id, date) with a 48-bit slot bitmap
+-- (bit i = slot starting i * 30 minutes past midnight). See backend/availability_bitmap.py
+CREATE TABLE IF NOT EXISTS court_day_availability (
+    court_id UUID NOT NULL,
+    date DATE NOT NULL,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    location_name TEXT NOT NULL,
+    court_name TEXT NOT NULL,
+    court_type TEXT,
+    price_cents INTEGER DEFAULT 0,
+    price_type TEXT DEFAULT 'perHour',
+    slot_bitmap BIGINT NOT NULL DEFAULT 0,
+    durations JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (court_id, date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_court_day_availability_date ON court_day_availability(date);
+
+ALTER TABLE court_day_availability ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access on court_day_availability"
+    ON court_day_availability FOR SELECT
+    USING (true);
+
+-- User subscriptions for "slot opened" / "slot taken" alerts
+-- Matched in the scraper by backend/change_events.py after each scrape
+CREATE TABLE IF NOT EXISTS slot_subscriptions (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    court_type TEXT,
+    start_time TIME,
+    end_time TIME,
+    min_duration_minutes INTEGER,
+    days_of_week INTEGER[],
+    events TEXT[] DEFAULT ARRAY['slot_opened'],
+    webhook_url TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- The scraper only ever loads active subscriptions
+CREATE INDEX IF NOT EXISTS idx_slot_subscriptions_active ON slot_subscriptions(is_active) WHERE is_active;
+
+COMMENT ON TABLE slot_subscriptions IS 'Alert subscriptions matched against availability changes';
+COMMENT ON COLUMN slot_subscriptions.location_id IS 'Location to watch (NULL = any location)';
+COMMENT ON COLUMN slot_subscriptions.court_type IS 'tennis or pickleball (NULL = any sport)';
+COMMENT ON COLUMN slot_subscriptions.days_of_week IS 'Weekdays to watch, 0=Monday (NULL = every day)';
+COMMENT ON COLUMN slot_subscriptions.events IS 'Event types to deliver: slot_opened and/or slot_taken';
+
+-- Subscriptions contain webhook URLs, so no public read policy
+ALTER TABLE slot_subscriptions ENABLE ROW LEVEL SECURITY;
+
+-- Court metadata, rewritten only when a court's rec.us config changes
+-- (see CourtConfigCache in backend/scraper.py)
+CREATE TABLE IF NOT EXISTS courts (
+    id UUID PRIMARY KEY,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    court_name TEXT NOT NULL,
+    court_type TEXT,
+    price_cents INTEGER DEFAULT 0,
+    price_type TEXT DEFAULT 'perHour',
+    max_duration_minutes INTEGER,
+    config_fingerprint TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_courts_location ON courts(location_id);
+
+ALTER TABLE courts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access on courts"
+    ON courts FOR SELECT
+    USING (true);
+
+-- Expiring leases that keep concurrent scrapers (cron, manual modal run,
+-- populate_database.py, the daemon) from writing availability at the same time.
+-- Taken and released by backend/storage.py via acquire_lease / release_lease.
+CREATE TABLE IF NOT EXISTS scrape_leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+COMMENT ON TABLE scrape_leases IS 'Named locks held by scraper runs; expired rows are free';
+COMMENT ON COLUMN scrape_leases.owner IS 'hostname:pid of the holder';
+
+-- Only the service role touches leases
+ALTER TABLE scrape_leases ENABLE ROW LEVEL SECURITY;
+
+-- Take the lease if it is free, expired or already ours. A single upsert, so
+-- two callers can never both succeed.
+CREATE OR REPLACE FUNCTION acquire_lease(p_name TEXT, p_owner TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    acquired_owner TEXT;
+BEGIN
+    INSERT INTO scrape_leases (name, owner, expires_at)
+    VALUES (p_name, p_owner, NOW() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+        WHERE scrape_leases.expires_at < NOW() OR scrape_leases.owner = EXCLUDED.owner
+    RETURNING owner INTO acquired_owner;
+    RETURN acquired_owner IS NOT NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_lease(p_name TEXT, p_owner TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    DELETE FROM scrape_leases WHERE name = p_name AND owner = p_owner;
+$$;
+
+REVOKE EXECUTE ON FUNCTION acquire_lease(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_lease(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION acquire_lease(TEXT, TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION release_lease(TEXT, TEXT) TO service_role;
@@ -0,0 +1,31 @@
+-- Compact availability format: one row per (court_id, date)
+-- slot_bitmap has bit i set when the 30-minute slot starting at i * 30 minutes past midnight is free
+-- (48 bits per day, fits in a BIGINT). See backend/availability_bitmap.py for encode/decode helpers.
+
+CREATE TABLE IF NOT EXISTS court_day_availability (
+    court_id UUID NOT NULL,
+    date DATE NOT NULL,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    location_name TEXT NOT NULL,
+    court_name TEXT NOT NULL,
+    court_type TEXT,
+    price_cents INTEGER DEFAULT 0,
+    price_type TEXT DEFAULT 'perHour',
+    slot_bitmap BIGINT NOT NULL DEFAULT 0,
+    durations JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (court_id, date)
+);
+
+-- Day queries only need the date
+CREATE INDEX IF NOT EXISTS idx_court_day_availability_date ON court_day_availability(date);
+
+COMMENT ON TABLE court_day_availability IS 'Bitmap-encoded court availability, one row per court per day';
+COMMENT ON COLUMN court_day_availability.slot_bitmap IS 'Bit i set when the slot starting at i * 30 minutes past midnight is available';
+COMMENT ON COLUMN court_day_availability.durations IS 'Map of slot start time (HH:MM:SS) to bookable duration in minutes';
+
+ALTER TABLE court_day_availability ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access on court_day_availability"
+    ON court_day_availability FOR SELECT
+    USING (true);
@@ -0,0 +1,28 @@
+-- User subscriptions for "slot opened" / "slot taken" alerts
+-- Matched in the scraper by backend/change_events.py after each scrape
+
+CREATE TABLE IF NOT EXISTS slot_subscriptions (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    court_type TEXT,
+    start_time TIME,
+    end_time TIME,
+    min_duration_minutes INTEGER,
+    days_of_week INTEGER[],
+    events TEXT[] DEFAULT ARRAY['slot_opened'],
+    webhook_url TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- The scraper only ever loads active subscriptions
+CREATE INDEX IF NOT EXISTS idx_slot_subscriptions_active ON slot_subscriptions(is_active) WHERE is_active;
+
+COMMENT ON TABLE slot_subscriptions IS 'Alert subscriptions matched against availability changes';
+COMMENT ON COLUMN slot_subscriptions.location_id IS 'Location to watch (NULL = any location)';
+COMMENT ON COLUMN slot_subscriptions.court_type IS 'tennis or pickleball (NULL = any sport)';
+COMMENT ON COLUMN slot_subscriptions.days_of_week IS 'Weekdays to watch, 0=Monday (NULL = every day)';
+COMMENT ON COLUMN slot_subscriptions.events IS 'Event types to deliver: slot_opened and/or slot_taken';
+
+-- Subscriptions contain webhook URLs, so no public read policy
+ALTER TABLE slot_subscriptions ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,182 @@
+-- Partition availability by date (native range partitions, one per day)
+-- Queries filtered on date (as in CourtMap.tsx) prune to a single partition, and
+-- expired days are removed by dropping their partition instead of DELETE scans.
+-- Partitions are created ahead of time / dropped by the maintenance functions below,
+-- called daily from backend/maintenance.py.
+
+-- The view depends on the table being replaced
+DROP VIEW IF EXISTS availability_with_location;
+
+ALTER TABLE availability RENAME TO availability_unpartitioned;
+
+-- Index and constraint names are schema-wide and stay with the renamed table;
+-- move them aside so the partitioned table's own are actually created below
+-- (and aren't dropped along with availability_unpartitioned)
+ALTER TABLE availability_unpartitioned RENAME CONSTRAINT availability_pkey TO availability_unpartitioned_pkey;
+ALTER INDEX IF EXISTS idx_availability_location_id RENAME TO idx_availability_unpartitioned_location_id;
+ALTER INDEX IF EXISTS idx_availability_date RENAME TO idx_availability_unpartitioned_date;
+ALTER INDEX IF EXISTS idx_availability_court_id RENAME TO idx_availability_unpartitioned_court_id;
+ALTER INDEX IF EXISTS idx_availability_slot_datetime RENAME TO idx_availability_unpartitioned_slot_datetime;
+ALTER INDEX IF EXISTS idx_availability_is_available RENAME TO idx_availability_unpartitioned_is_available;
+ALTER INDEX IF EXISTS idx_availability_court_type RENAME TO idx_availability_unpartitioned_court_type;
+ALTER INDEX IF EXISTS idx_availability_date_location RENAME TO idx_availability_unpartitioned_date_location;
+
+CREATE TABLE availability (
+    id UUID DEFAULT gen_random_uuid(),
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    location_name TEXT NOT NULL,
+    court_id UUID NOT NULL,
+    court_name TEXT NOT NULL,
+    slot_datetime TIMESTAMP NOT NULL,
+    date DATE NOT NULL,
+    time TIME NOT NULL,
+    price_cents INTEGER DEFAULT 0,
+    price_type TEXT DEFAULT 'perHour',
+    court_type TEXT,
+    duration_minutes INTEGER,
+    is_available BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    -- Unique constraints on a partitioned table must include the partition key
+    PRIMARY KEY (id, date),
+    UNIQUE (court_id, slot_datetime, date)
+) PARTITION BY RANGE (date);
+
+-- Catches rows outside the pre-created range so inserts never fail
+CREATE TABLE IF NOT EXISTS availability_default PARTITION OF availability DEFAULT;
+ALTER TABLE availability_default ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_availability_location_id ON availability(location_id);
+CREATE INDEX IF NOT EXISTS idx_availability_date ON availability(date);
+CREATE INDEX IF NOT EXISTS idx_availability_court_id ON availability(court_id);
+CREATE INDEX IF NOT EXISTS idx_availability_slot_datetime ON availability(slot_datetime);
+CREATE INDEX IF NOT EXISTS idx_availability_is_available ON availability(is_available);
+CREATE INDEX IF NOT EXISTS idx_availability_court_type ON availability(court_type);
+CREATE INDEX IF NOT EXISTS idx_availability_date_location ON availability(date, location_id);
+
+COMMENT ON TABLE availability IS 'Available time slots for court reservations (partitioned by date)';
+COMMENT ON COLUMN availability.slot_datetime IS 'Full datetime of the available slot';
+COMMENT ON COLUMN availability.date IS 'Date component for easy filtering (partition key)';
+COMMENT ON COLUMN availability.time IS 'Time component for easy filtering';
+COMMENT ON COLUMN availability.price_cents IS 'Price in cents (e.g., 500 = $5.00)';
+COMMENT ON COLUMN availability.price_type IS 'Pricing type (e.g., perHour)';
+COMMENT ON COLUMN availability.court_type IS 'Type of court: tennis or pickleball';
+COMMENT ON COLUMN availability.duration_minutes IS 'Duration of the booking slot in minutes (e.g., 30, 60, 90)';
+
+-- Create one partition per day from start_date for days_ahead days (idempotent)
+CREATE OR REPLACE FUNCTION create_availability_partitions(days_ahead INTEGER DEFAULT 60, start_date DATE DEFAULT CURRENT_DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..days_ahead LOOP
+        day := start_date + i;
+        partition_name := 'availability_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass('public.' || partition_name) IS NULL THEN
+            -- Build the partition standalone, move any rows for this day out of the
+            -- default partition, then attach (attaching fails if default still has them)
+            EXECUTE format(
+                'CREATE TABLE public.%I (LIKE public.availability INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'INSERT INTO public.%I SELECT * FROM public.availability_default WHERE date = %L',
+                partition_name, day
+            );
+            DELETE FROM availability_default WHERE date = day;
+            EXECUTE format(
+                'ALTER TABLE public.availability ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, day, day + 1
+            );
+            -- Partitions are reachable directly through the API; RLS without policies
+            -- blocks that, while reads through the parent use its policies
+            EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- Drop daily partitions for dates before CURRENT_DATE - retain_days (O(1) per day)
+CREATE OR REPLACE FUNCTION drop_expired_availability_partitions(retain_days INTEGER DEFAULT 0)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+    cutoff TEXT := 'availability_p' || to_char(CURRENT_DATE - retain_days, 'YYYYMMDD');
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'availability'
+          AND c.relname ~ '^availability_p[0-9]{8}$'
+          AND c.relname < cutoff
+    LOOP
+        EXECUTE format('DROP TABLE public.%I', part.relname);
+        dropped := dropped + 1;
+    END LOOP;
+    -- Rows that landed in the default partition are cleaned up the slow way
+    DELETE FROM availability_default WHERE date < CURRENT_DATE - retain_days;
+    RETURN dropped;
+END;
+$$;
+
+-- Full replace for each scrape: TRUNCATE is O(partitions) instead of a DELETE scan
+CREATE OR REPLACE FUNCTION truncate_availability()
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    TRUNCATE availability;
+$$;
+
+-- Maintenance functions are for the scraper (service role) only
+REVOKE EXECUTE ON FUNCTION create_availability_partitions(INTEGER, DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION drop_expired_availability_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION truncate_availability() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_availability_partitions(INTEGER, DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_expired_availability_partitions(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION truncate_availability() TO service_role;
+
+-- Pre-create partitions covering existing rows and the booking horizon, then copy data over
+SELECT create_availability_partitions(
+    GREATEST(60, COALESCE((SELECT MAX(date) FROM availability_unpartitioned), CURRENT_DATE) - CURRENT_DATE)
+);
+
+INSERT INTO availability (
+    id, location_id, location_name, court_id, court_name, slot_datetime, date, time,
+    price_cents, price_type, court_type, duration_minutes, is_available, created_at
+)
+SELECT
+    id, location_id, location_name, court_id, court_name, slot_datetime, date, time,
+    price_cents, price_type, court_type, duration_minutes, is_available, created_at
+FROM availability_unpartitioned
+WHERE date >= CURRENT_DATE;  -- expired rows are not carried over
+
+DROP TABLE availability_unpartitioned;
+
+CREATE OR REPLACE VIEW availability_with_location AS
+SELECT
+    a.*,
+    l.name as full_location_name,
+    l.address,
+    l.lat,
+    l.lng,
+    l.hours_of_operation
+FROM availability a
+LEFT JOIN locations l ON a.location_id = l.id
+WHERE a.is_available = TRUE
+ORDER BY a.date, a.time;
+
+ALTER TABLE availability ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access on availability"
+    ON availability FOR SELECT
+    USING (true);
@@ -0,0 +1,21 @@
+-- Replace the per-column availability indexes with one index shaped for the real reads
+-- The frontend only runs:
+--     WHERE date = ? AND is_available [AND court_type = ?] ORDER BY time
+-- Every extra index slows the full rewrite each scrape cycle, so keep only:
+--   * the primary key and (court_id, slot_datetime, date) unique constraint (upserts)
+--   * a partial index on (date, court_type, time) over available rows, covering the
+--     columns the map groups and dedupes on
+-- Checked by backend/scripts/check_query_plans.py against a local Postgres.
+
+DROP INDEX IF EXISTS idx_availability_location_id;
+DROP INDEX IF EXISTS idx_availability_date;
+DROP INDEX IF EXISTS idx_availability_court_id;
+DROP INDEX IF EXISTS idx_availability_slot_datetime;
+DROP INDEX IF EXISTS idx_availability_is_available;
+DROP INDEX IF EXISTS idx_availability_court_type;
+DROP INDEX IF EXISTS idx_availability_date_location;
+
+CREATE INDEX IF NOT EXISTS idx_availability_open_by_date_sport
+    ON availability (date, court_type, time)
+    INCLUDE (location_id, duration_minutes, price_cents)
+    WHERE is_available;
@@ -0,0 +1,53 @@
+-- Server-side version of what CourtMap.tsx used to do in the browser:
+-- every location (including ones with nothing free), each with its available
+-- slots for the date deduplicated per (court_type, time, duration) and sorted by time.
+-- Response size is bounded by location count x distinct start times, not row count.
+-- Python reference implementation: backend/map_availability.py
+
+CREATE OR REPLACE FUNCTION get_available_courts(p_date DATE, p_sport TEXT DEFAULT NULL)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    address TEXT,
+    lat NUMERIC,
+    lng NUMERIC,
+    hours_of_operation TEXT,
+    description TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    available_slots JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        l.id, l.name, l.address, l.lat, l.lng, l.hours_of_operation, l.description,
+        l.created_at, l.updated_at,
+        COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object(
+                    'time', s.time,
+                    'duration_minutes', s.duration_minutes,
+                    'court_type', s.court_type,
+                    'price_cents', s.price_cents
+                )
+                ORDER BY s.time, s.court_type, s.duration_minutes
+            )
+            FROM (
+                -- One row per (sport, start time, duration), as the map renders them
+                SELECT DISTINCT ON (a.court_type, a.time, a.duration_minutes)
+                    a.time, a.duration_minutes, a.court_type, a.price_cents
+                FROM availability a
+                WHERE a.date = p_date
+                  AND a.is_available
+                  AND a.location_id = l.id
+                  AND (p_sport IS NULL OR a.court_type = p_sport)
+                ORDER BY a.court_type, a.time, a.duration_minutes, a.price_cents
+            ) s
+        ), '[]'::jsonb) AS available_slots
+    FROM locations l
+    ORDER BY l.name;
+$$;
+
+COMMENT ON FUNCTION get_available_courts(DATE, TEXT) IS
+    'Locations with deduplicated available slots for a date, optionally filtered by court_type';
@@ -0,0 +1,46 @@
+-- Expiring leases that keep concurrent scrapers (cron, manual modal run,
+-- populate_database.py) from writing availability at the same time.
+-- Taken and released by backend/storage.py via acquire_lease / release_lease.
+
+CREATE TABLE IF NOT EXISTS scrape_leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+COMMENT ON TABLE scrape_leases IS 'Named locks held by scraper runs; expired rows are free';
+COMMENT ON COLUMN scrape_leases.owner IS 'hostname:pid of the holder';
+
+-- Only the service role touches leases
+ALTER TABLE scrape_leases ENABLE ROW LEVEL SECURITY;
+
+-- Take the lease if it is free, expired or already ours. A single upsert, so
+-- two callers can never both succeed.
+CREATE OR REPLACE FUNCTION acquire_lease(p_name TEXT, p_owner TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    acquired_owner TEXT;
+BEGIN
+    INSERT INTO scrape_leases (name, owner, expires_at)
+    VALUES (p_name, p_owner, NOW() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+        WHERE scrape_leases.expires_at < NOW() OR scrape_leases.owner = EXCLUDED.owner
+    RETURNING owner INTO acquired_owner;
+    RETURN acquired_owner IS NOT NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_lease(p_name TEXT, p_owner TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    DELETE FROM scrape_leases WHERE name = p_name AND owner = p_owner;
+$$;
+
+REVOKE EXECUTE ON FUNCTION acquire_lease(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_lease(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION acquire_lease(TEXT, TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION release_lease(TEXT, TEXT) TO service_role;
@@ -0,0 +1,26 @@
+-- One row per court, rewritten by the scraper only when the court's rec.us
+-- config changes (see CourtConfigCache in backend/scraper.py)
+
+CREATE TABLE IF NOT EXISTS courts (
+    id UUID PRIMARY KEY,
+    location_id UUID REFERENCES locations(id) ON DELETE CASCADE,
+    court_name TEXT NOT NULL,
+    court_type TEXT,
+    price_cents INTEGER DEFAULT 0,
+    price_type TEXT DEFAULT 'perHour',
+    max_duration_minutes INTEGER,
+    config_fingerprint TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_courts_location ON courts(location_id);
+
+COMMENT ON TABLE courts IS 'Court metadata compiled from rec.us court config';
+COMMENT ON COLUMN courts.config_fingerprint IS 'sha1 of the court''s config, sports and maxReservationTime';
+COMMENT ON COLUMN courts.max_duration_minutes IS 'Longest booking when the court has no fixed slots';
+
+ALTER TABLE courts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow public read access on courts"
+    ON courts FOR SELECT
+    USING (true);
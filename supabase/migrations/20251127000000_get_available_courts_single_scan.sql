@@ -0,0 +1,64 @@
+-- get_available_courts, rewritten as one grouped scan of the date (and sport)
+-- The first version ran a correlated subquery per location (a.location_id = l.id),
+-- which idx_availability_open_by_date_sport (keyed on date, court_type, time)
+-- can't serve. This reads the date's available rows once through that index
+-- (location_id, duration_minutes and price_cents are INCLUDEd, so it is an
+-- index-only scan), dedupes and groups them, then joins to locations.
+-- The plan is checked by backend/scripts/check_query_plans.py.
+-- Python reference implementation: backend/map_availability.py
+
+CREATE OR REPLACE FUNCTION get_available_courts(p_date DATE, p_sport TEXT DEFAULT NULL)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    address TEXT,
+    lat NUMERIC,
+    lng NUMERIC,
+    hours_of_operation TEXT,
+    description TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    available_slots JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH slots AS (
+        -- One row per (location, sport, start time, duration), as the map renders them
+        SELECT DISTINCT ON (a.location_id, a.court_type, a.time, a.duration_minutes)
+            a.location_id, a.time, a.duration_minutes, a.court_type, a.price_cents
+        FROM availability a
+        WHERE a.date = p_date
+          AND a.is_available
+          AND (p_sport IS NULL OR a.court_type = p_sport)
+        ORDER BY a.location_id, a.court_type, a.time, a.duration_minutes, a.price_cents
+    ),
+    by_location AS (
+        SELECT
+            s.location_id,
+            jsonb_agg(
+                jsonb_build_object(
+                    'time', s.time,
+                    'duration_minutes', s.duration_minutes,
+                    'court_type', s.court_type,
+                    'price_cents', s.price_cents
+                )
+                ORDER BY s.time, s.court_type, s.duration_minutes
+            ) AS available_slots
+        FROM slots s
+        GROUP BY s.location_id
+    )
+    SELECT
+        l.id, l.name, l.address, l.lat, l.lng, l.hours_of_operation, l.description,
+        l.created_at, l.updated_at,
+        COALESCE(b.available_slots, '[]'::jsonb) AS available_slots
+    FROM locations l
+    LEFT JOIN by_location b ON b.location_id = l.id
+    ORDER BY l.name;
+$$;
+
+COMMENT ON FUNCTION get_available_courts(DATE, TEXT) IS
+    'Locations with deduplicated available slots for a date, optionally filtered by court_type';
+
+-- Called by the frontend with the anon key
+GRANT EXECUTE ON FUNCTION get_available_courts(DATE, TEXT) TO anon, authenticated;